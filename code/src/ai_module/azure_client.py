@@ -1,7 +1,11 @@
 import os
 import logging
+import threading
+import httpx
 from openai import AzureOpenAI
 
+from src.ai_module.streaming import StreamStats
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -10,7 +14,8 @@ class AzureClient:
     """
     Wrapper for interactions with Azure OpenAI Service.
     """
-    def __init__(self):
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 60,
+                 retries: int = 3, pool_size: int = 4):
         # ------------------------------------------------------------------
         # AZURE CONFIGURATION (USER MUST FILL THIS IN)
         # ------------------------------------------------------------------
@@ -30,49 +35,119 @@ class AzureClient:
         self.deployment_name = "YOUR_DEPLOYMENT_NAME"
         # ------------------------------------------------------------------
 
-        # Initialize the Azure client
+        # Initialize the Azure client on a pooled keep-alive HTTP client.
+        # The SDK retries connection errors / 429 / 5xx with backoff itself.
         try:
+            self.http_client = httpx.Client(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
             self.client = AzureOpenAI(
                 api_key=self.api_key,
                 api_version=self.api_version,
-                azure_endpoint=self.azure_endpoint
+                azure_endpoint=self.azure_endpoint,
+                http_client=self.http_client,
+                max_retries=retries
             )
             logger.info("AzureOpenAI client initialized locally.")
         except Exception as e:
             logger.error(f"Failed to initialize AzureOpenAI client: {e}")
             self.client = None
 
-    def generate(self, prompt: str, max_tokens: int = 256) -> dict:
+        self.last_stats = None
+
+    def stream(self, prompt: str, max_tokens: int = 256, system: str = None, stats: StreamStats = None):
+        """
+        Yield the completion for `prompt` chunk by chunk as Azure streams it.
+        `system` (optional) is sent as the system message; `stats`
+        (optional) collects the timings of this call.
+        Raises on API errors; see generate() for the error-dict wrapper.
+        """
+        if not self.client:
+            raise RuntimeError("Azure Client not initialized. Check credentials.")
+
+        stats = stats or StreamStats(f"azure/{self.deployment_name}")
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        response = self.client.chat.completions.create(
+            model=self.deployment_name,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        try:
+            for chunk in response:
+                # The first chunk can carry only prompt-filter results
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    stats.on_chunk()
+                    yield content
+        finally:
+            # Closing the SDK stream releases the pooled connection instead of
+            # reading the rest of a cancelled completion in the background
+            response.close()
+            self.last_stats = stats.finish()
+
+    def generate(self, prompt: str, max_tokens: int = 256, on_token=None, cancel=None,
+                 system: str = None) -> dict:
         """
         Send a prompt to the Azure OpenAI model and return the response.
-        Matches the interface used by other clients (like MistralClient).
+        Matches the interface used by other clients (like MistralClient);
+        `on_token` (optional) is called with each chunk as it arrives and
+        setting the `cancel` event (optional) stops the stream early.
+        A successful result carries the timings of this call under "stats".
         """
         if not self.client:
             return {"error": "Azure Client not initialized. Check credentials."}
 
+        stats = StreamStats(f"azure/{self.deployment_name}")
+        tokens = self.stream(prompt, max_tokens, system=system, stats=stats)
         try:
-            # Call the specific deployment
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens
-            )
+            content = ""
+            result = None
+            for token in tokens:
+                if cancel is not None and cancel.is_set():
+                    logger.info("Azure request cancelled.")
+                    result = {"response": content, "cancelled": True}
+                    break
+                content += token
+                if on_token:
+                    on_token(token)
 
-            # Extract the content from the response
-            # Usage: response.choices[0].message.content
-            if response.choices:
-                content = response.choices[0].message.content
+            if result is None:
+                if not content:
+                    return {"error": "Empty response from Azure."}
                 logger.info("Azure response received successfully.")
-                return {"response": content}
-            else:
-                return {"error": "Empty response from Azure."}
+                result = {"response": content}
 
         except Exception as e:
             logger.error(f"Azure API Call Failed: {e}")
             return {"error": str(e)}
 
+        finally:
+            tokens.close()
+        result["stats"] = stats.as_dict()
+        return result
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a client from the "azure" section of config.json.
+        """
+        return cls(
+            connect_timeout=config.get("connect_timeout", 3.05),
+            read_timeout=config.get("read_timeout", 60),
+            retries=config.get("retries", 3),
+            pool_size=config.get("pool_size", 4),
+        )
+
+    def close(self):
+        if self.client:
+            self.client.close()
+
     def test_connection(self):
         """
         Simple test method to verify connectivity to Azure.
@@ -90,6 +165,21 @@ class AzureClient:
             print("✅ Connection Successful!")
             print(f"Received Response: {result['response']}")
 
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_azure_client(config: dict = None) -> AzureClient:
+    """
+    Long-lived client so the pooled HTTPS connection to Azure is reused.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = AzureClient.from_config(config or {})
+        return _default_client
+
+
 if __name__ == "__main__":
     # When running this file directly, test the connection
     client = AzureClient()
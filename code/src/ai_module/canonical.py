@@ -0,0 +1,58 @@
+import re
+
+# (name, pattern, replacement). Applied in order to lower-cased text, before
+# punctuation is stripped, so paths/URLs are still intact. Placeholders use
+# <...> which normalize_text keeps.
+DEFAULT_RULES = [
+    ("url", r"\b(?:https?|ftp)://\S+", "<url>"),
+    ("guid", r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", "<guid>"),
+    # Octets 0-255, not part of a longer dotted number or a word ("v1.2.3.4")
+    # and not after "version" / "ver" / "v", so 4-part version numbers
+    # (10.0.19041.1, "version 1.2.3.4") stay as they are
+    ("ip", r"(?<![\w.])(?<!\d\.)(?<!version )(?<!\bver )(?<!\bv )"
+           r"(?:25[0-5]|2[0-4]\d|1?\d?\d)(?:\.(?:25[0-5]|2[0-4]\d|1?\d?\d)){3}(?::\d+)?(?!\.?\d)(?!\w)", "<ip>"),
+    ("timestamp", r"\b\d{4}-\d{2}-\d{2}(?:[t ]\d{1,2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?\b", "<time>"),
+    ("date", r"\b\d{1,2}/\d{1,2}/\d{2,4}\b", "<time>"),
+    ("clock", r"\b\d{1,2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:\s?[ap]m)?\b", "<time>"),
+    ("windows_path", r"\b[a-z]:[\\/][^\s\"'<>|*?]*", "<path>"),
+    ("unc_path", r"\\\\[^\s\"'<>|*?]+", "<path>"),
+    ("unix_path", r"(?<![\w.])(?:~|\.{1,2})?/(?:[^\s/\"'<>|:]+/)+[^\s/\"'<>|:]*", "<path>"),
+    ("path_position", r"<path>:\d+(?::\d+)?", "<path>:<n>"),
+    ("hex", r"\b0x[0-9a-f]+\b", "<hex>"),
+    ("line", r"\b(line|ln|col|column|row)\s*[:#]?\s*\d+", r"\1 <n>"),
+    ("pid", r"\b(pid|process id|thread id|tid)\s*[:=#]?\s*\d+", r"\1 <n>"),
+]
+
+
+class Canonicalizer:
+    """
+    Replaces volatile spans (paths, line numbers, hex addresses, PIDs,
+    timestamps, ...) with placeholders so the same error seen twice maps to
+    the same DB key. Rules are compiled once.
+    """
+
+    def __init__(self, rules=None, disabled=()):
+        disabled = set(disabled)
+        self.rules = [
+            (name, re.compile(pattern), replacement)
+            for name, pattern, replacement in (rules if rules is not None else DEFAULT_RULES)
+            if name not in disabled
+        ]
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        "canonicalize" section of config.json:
+            enabled  - false turns canonicalization off entirely
+            disable  - names of default rules to skip
+            rules    - extra [name, pattern, replacement] rules, run after the defaults
+        """
+        if not config.get("enabled", True):
+            return cls(rules=[])
+        extra = [tuple(rule) for rule in config.get("rules", [])]
+        return cls(rules=DEFAULT_RULES + extra, disabled=config.get("disable", ()))
+
+    def __call__(self, text: str) -> str:
+        for _, pattern, replacement in self.rules:
+            text = pattern.sub(replacement, text)
+        return text
@@ -1,6 +1,13 @@
 import requests
+import urllib3
 import logging
 import json
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.ai_module.streaming import StreamStats
 
 logger = logging.getLogger(__name__)
 
@@ -10,39 +17,144 @@ class MistralClient:
     Assumes Ollama is running at http://localhost:11434.
     """
 
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "mistral",
+                 connect_timeout: float = 3.05, read_timeout: float = 60,
+                 retries: int = 3, backoff: float = 0.5, pool_size: int = 4,
+                 keep_alive=None):
         self.base_url = base_url.rstrip("/")
-        self.model = "mistral"
+        self.model = model
+        # How long Ollama keeps the model (and the evaluated system prompt)
+        # loaded after a request, e.g. "30m"; None uses the server default
+        self.keep_alive = keep_alive
+        self.last_stats = None
+        # (connect, read); the read timeout is the max gap between streamed chunks
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._make_session(retries, backoff, pool_size)
 
-    def generate(self, prompt: str, max_tokens: int = 256) -> dict:
+    @staticmethod
+    def _make_session(retries, backoff, pool_size):
         """
-        Send a prompt to the Mistral model and return the response.
-        Handles Ollama's streaming NDJSON output.
+        Pooled keep-alive session. Only connection errors are retried (the
+        request never reached Ollama, so retrying a POST is safe).
         """
-        try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "options": {"num_predict": max_tokens}
-                },
-                stream=True,   # <-- important
-                timeout=60     # give it more time
-            )
-            response.raise_for_status()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=backoff,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
-            full_text = ""
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a client from the "ollama" section of config.json.
+        """
+        return cls(
+            base_url=config.get("base_url", "http://localhost:11434"),
+            model=config.get("model", "mistral"),
+            connect_timeout=config.get("connect_timeout", 3.05),
+            read_timeout=config.get("read_timeout", 60),
+            retries=config.get("retries", 3),
+            backoff=config.get("backoff", 0.5),
+            pool_size=config.get("pool_size", 4),
+            keep_alive=config.get("keep_alive"),
+        )
+
+    def close(self):
+        self.session.close()
+
+    def _stream_ndjson(self, endpoint: str, payload: dict, extract, stats: StreamStats = None):
+        """
+        POST to an Ollama streaming endpoint and yield text chunks as the
+        NDJSON lines arrive. `extract` pulls the text out of one line.
+        Records time-to-first-token, tokens/sec and the prompt token count
+        Ollama reports in `stats` (a new StreamStats by default) and in
+        self.last_stats. A read timeout between chunks is raised as
+        requests' ReadTimeout.
+        """
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        stats = stats or StreamStats(f"ollama/{self.model}")
+        response = self.session.post(
+            f"{self.base_url}{endpoint}",
+            json=payload,
+            stream=True,   # <-- important
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        eval_count = None
+        prompt_eval_count = None
+        try:
             for line in response.iter_lines():
                 if line:
                     data = json.loads(line.decode("utf-8"))
-                    if "response" in data:
-                        full_text += data["response"]
+                    chunk = extract(data)
+                    if chunk:
+                        stats.on_chunk()
+                        yield chunk
                     if data.get("done"):
+                        eval_count = data.get("eval_count")
+                        prompt_eval_count = data.get("prompt_eval_count")
                         break
+        except requests.exceptions.ConnectionError as e:
+            # requests reports a read timeout while streaming as a ConnectionError
+            if e.args and isinstance(e.args[0], urllib3.exceptions.ReadTimeoutError):
+                raise requests.exceptions.ReadTimeout(e) from e
+            raise
+        finally:
+            response.close()
+            self.last_stats = stats.finish(eval_count, prompt_tokens=prompt_eval_count)
 
-            logger.info("Mistral response received successfully.")
-            return {"response": full_text}
+    def stream(self, prompt: str, max_tokens: int = 256, system: str = None, stats: StreamStats = None):
+        """
+        Yield the completion for `prompt` token by token.
+        `system` (optional) is sent as Ollama's system prompt; `stats`
+        (optional) collects the timings of this call.
+        Raises requests exceptions; see generate() for the error-dict wrapper.
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "options": {"num_predict": max_tokens}
+        }
+        if system:
+            payload["system"] = system
+        return self._stream_ndjson("/api/generate", payload, lambda data: data.get("response"), stats)
+
+    def generate(self, prompt: str, max_tokens: int = 256, on_token=None, cancel=None,
+                 system: str = None) -> dict:
+        """
+        Send a prompt to the Mistral model and return the response.
+        Handles Ollama's streaming NDJSON output; `on_token` (optional) is
+        called with each chunk as soon as it arrives. Setting the `cancel`
+        event (optional threading.Event) stops the stream early.
+        A successful result carries the timings of this call under "stats"
+        (see StreamStats.as_dict); self.last_stats is shared by every caller.
+        """
+        stats = StreamStats(f"ollama/{self.model}")
+        tokens = self.stream(prompt, max_tokens, system=system, stats=stats)
+        try:
+            full_text = ""
+            result = None
+            for token in tokens:
+                if cancel is not None and cancel.is_set():
+                    logger.info("Mistral request cancelled.")
+                    result = {"response": full_text, "cancelled": True}
+                    break
+                full_text += token
+                if on_token:
+                    on_token(token)
+            else:
+                logger.info("Mistral response received successfully.")
+                result = {"response": full_text}
 
         except requests.exceptions.Timeout:
             logger.error("Mistral request timed out.")
@@ -56,35 +168,101 @@ class MistralClient:
             logger.exception("Unexpected error while calling Mistral.")
             return {"error": str(e)}
 
-    def chat(self, messages: list[dict]) -> dict:
+        finally:
+            # Closing the generator closes the HTTP response (aborts Ollama)
+            tokens.close()
+        result["stats"] = stats.as_dict()
+        return result
+
+    def warm_up(self, keep_alive=None) -> dict:
+        """
+        Load the model into memory without generating anything (an empty
+        generate request) and keep it loaded for `keep_alive` (defaults to
+        self.keep_alive). Returns the wall time and Ollama's load time.
+        """
+        payload = {"model": self.model}
+        keep_alive = keep_alive if keep_alive is not None else self.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        start = time.perf_counter()
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json=payload,
+            timeout=(self.timeout[0], None),   # a cold load can take a while
+        )
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "seconds": time.perf_counter() - start,
+            "load_ms": (data.get("load_duration") or 0) / 1e6,
+        }
+
+    def unload(self):
+        """
+        Ask Ollama to drop the model from memory now.
+        """
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json={"model": self.model, "keep_alive": 0},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def is_loaded(self) -> bool:
+        """
+        True if Ollama currently has the model in memory (/api/ps).
+        """
+        response = self.session.get(f"{self.base_url}/api/ps", timeout=self.timeout)
+        response.raise_for_status()
+        names = set()
+        for m in response.json().get("models", []):
+            names.update((m.get("name"), m.get("model")))
+        return self.model in names or f"{self.model}:latest" in names
+
+    def stream_chat(self, messages: list[dict]):
+        """
+        Yield a chat reply chunk by chunk.
+        """
+        return self._stream_ndjson(
+            "/api/chat",
+            {
+                "model": self.model,
+                "messages": messages
+            },
+            lambda data: (data.get("message") or {}).get("content"),
+        )
+
+    def chat(self, messages: list[dict], on_token=None) -> dict:
         """
         Chat-style interface with Mistral.
         messages = [{"role": "user", "content": "Hello!"}]
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages
-                },
-                stream=True,
-                timeout=60
-            )
-            response.raise_for_status()
-
             full_text = ""
-            for line in response.iter_lines():
-                if line:
-                    data = json.loads(line.decode("utf-8"))
-                    if "response" in data:
-                        full_text += data["response"]
-                    if data.get("done"):
-                        break
+            for token in self.stream_chat(messages):
+                full_text += token
+                if on_token:
+                    on_token(token)
 
             logger.info("Mistral chat response received successfully.")
             return {"response": full_text}
 
         except Exception as e:
             logger.exception("Error in Mistral chat call.")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_mistral_client(config: dict = None) -> MistralClient:
+    """
+    Long-lived client shared by every capture, so the pooled connection to
+    Ollama is reused instead of opening a new one per request.
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = MistralClient.from_config(config or {})
+        return _default_client
@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """
+    One backend request shared by every caller that asked for the same prompt
+    while it was running.
+    """
+
+    def __init__(self):
+        self.tokens = []
+        self.subscribers = []
+        self.participants = []      # cancel events of the callers (None = never cancels)
+        self.cancel = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.lock = threading.Lock()
+
+    def join(self, on_token, cancel) -> bool:
+        """
+        Attach a caller. Returns False when the request is already being
+        aborted; the caller must start a new flight instead.
+        """
+        with self.lock:
+            if self.cancel.is_set():
+                return False
+            # Replay what has already streamed, then follow live
+            if on_token:
+                for token in self.tokens:
+                    on_token(token)
+                self.subscribers.append(on_token)
+            self.participants.append(cancel)
+            return True
+
+    def leave(self, on_token):
+        with self.lock:
+            if on_token in self.subscribers:
+                self.subscribers.remove(on_token)
+
+    def abandoned(self) -> bool:
+        """
+        Abort the shared request once every caller has given up. Checked and
+        set under the lock, so join() either gets in first or sees `cancel`.
+        """
+        with self.lock:
+            if not self.cancel.is_set() and all(p is not None and p.is_set() for p in self.participants):
+                self.cancel.set()
+            return self.cancel.is_set()
+
+    def publish(self, token):
+        self.abandoned()
+        with self.lock:
+            self.tokens.append(token)
+            subscribers = list(self.subscribers)
+        for on_token in subscribers:
+            try:
+                on_token(token)
+            except Exception:
+                logger.exception("on_token callback failed")
+
+
+class CoalescingClient:
+    """
+    Sits in front of a backend client (MistralClient, AzureClient, ...) with
+    the same generate() interface and:
+    - coalesces identical (normalized) prompts onto one in-flight request
+    - memoizes completed answers for `ttl` seconds (bounded LRU)
+    - caps the number of concurrent backend calls
+    and counts how many backend calls that saved.
+    """
+
+    def __init__(self, backend, ttl: float = 600, max_concurrent: int = 1, max_entries: int = 128):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._memo = OrderedDict()    # key -> (expires_at, result)
+        self.requests = 0
+        self.backend_calls = 0
+        self.coalesced = 0
+        self.memo_hits = 0
+
+    @classmethod
+    def from_config(cls, backend, config: dict):
+        """
+        Wrap `backend` using the "llm_dedupe" section of config.json.
+        """
+        return cls(
+            backend,
+            ttl=config.get("ttl", 600),
+            max_concurrent=config.get("max_concurrent", 1),
+            max_entries=config.get("max_entries", 128),
+        )
+
+    @staticmethod
+    def _key(prompt: str, max_tokens: int, system: str = None) -> str:
+        normalized = " ".join(prompt.split())
+        system = " ".join((system or "").split())
+        return hashlib.sha1(f"{max_tokens}\0{system}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def request_key(self, prompt: str, max_tokens: int = 256, system: str = None) -> str:
+        """
+        Key under which generate() would coalesce / memoize this request.
+        """
+        return self._key(prompt, max_tokens, system)
+
+    def _memo_get(self, key):
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._memo[key]
+            return None
+        self._memo.move_to_end(key)
+        return result
+
+    def _memo_put(self, key, result):
+        self._memo[key] = (time.monotonic() + self.ttl, result)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+
+    def generate(self, prompt: str, max_tokens: int = 256, on_token=None, cancel=None,
+                 system: str = None) -> dict:
+        key = self._key(prompt, max_tokens, system)
+        with self._lock:
+            self.requests += 1
+        while True:
+            with self._lock:
+                memo = self._memo_get(key)
+                if memo is not None:
+                    self.memo_hits += 1
+                    break
+                flight = self._inflight.get(key)
+                # A flight whose callers all cancelled is dying; don't join it
+                leader = flight is None or flight.cancel.is_set()
+                if leader:
+                    flight = _Flight()
+                    self._inflight[key] = flight
+            if flight.join(on_token, cancel):
+                break
+
+        if memo is not None:
+            logger.info("LLM answer served from memo cache.")
+            if on_token:
+                on_token(memo["response"])
+            # No backend call was timed for this answer
+            return {key: value for key, value in memo.items() if key != "stats"}
+
+        if not leader:
+            with self._lock:
+                self.coalesced += 1
+        else:
+            # The request runs on its own thread so every caller, including
+            # the first, can stop waiting (cancel) without killing it for the rest
+            threading.Thread(
+                target=self._run_flight,
+                args=(key, flight, prompt, max_tokens, system),
+                name="llm-flight",
+                daemon=True,
+            ).start()
+        return self._wait(flight, on_token, cancel)
+
+    def _run_flight(self, key, flight, prompt, max_tokens, system):
+        result = None
+        try:
+            # Wait for a backend slot, giving up if every caller cancels
+            while not self._slots.acquire(timeout=0.1):
+                if flight.abandoned():
+                    result = {"response": "", "cancelled": True}
+                    return
+            try:
+                with self._lock:
+                    self.backend_calls += 1
+                result = self.backend.generate(
+                    prompt, max_tokens, on_token=flight.publish, cancel=flight.cancel, system=system
+                )
+            finally:
+                self._slots.release()
+        except Exception as e:
+            logger.exception("Backend call failed.")
+            result = {"error": str(e)}
+        finally:
+            with self._lock:
+                # A replacement flight may already be registered under the key
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if result and "error" not in result and not result.get("cancelled") and not flight.cancel.is_set():
+                    self._memo_put(key, result)
+            flight.result = result
+            flight.done.set()
+
+    @staticmethod
+    def _wait(flight, on_token, cancel):
+        while not flight.done.wait(0.1):
+            if cancel is not None and cancel.is_set():
+                flight.leave(on_token)
+                return {"response": "".join(flight.tokens), "cancelled": True}
+        flight.leave(on_token)
+        if cancel is not None and cancel.is_set():
+            return {"response": flight.result.get("response", ""), "cancelled": True}
+        return dict(flight.result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "backend_calls": self.backend_calls,
+                "coalesced": self.coalesced,
+                "memo_hits": self.memo_hits,
+                "calls_saved": self.coalesced + self.memo_hits,
+                "in_flight": len(self._inflight),
+                "memoized": len(self._memo),
+            }
@@ -1,38 +1,372 @@
-import json
 import os
+import re
+import logging
+import threading
+import time
+from collections import OrderedDict
 
-DB_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'errors_db.json')
+from src import metrics
+from src.ai_module.canonical import Canonicalizer
+from src.ai_module.matcher import ErrorMatcher, Match
+from src.ai_module.store import get_store
+from src.ai_module.tiers import AI_CATEGORY, AITier
 
+logger = logging.getLogger(__name__)
 
-def normalize_text(text: str) -> str:
+# Seconds before a failed embedding index sync is tried again
+INDEX_RETRY = 30
+
+
+_default_canonicalizer = Canonicalizer()
+
+
+def normalize_text(text: str, canonicalize=None) -> str:
+    """
+    Normalize OCR text (and DB keys) for matching.
+    Volatile spans (paths, line numbers, addresses, ...) are replaced with
+    <placeholders> first, so they don't make every capture a new DB key.
     """
-    Normalize OCR text for matching
+    text = text.lower()
+    text = text.replace("’", "'")
+    text = (canonicalize or _default_canonicalizer)(text)
+    text = re.sub(r"[^a-z0-9.<>\s]", " ", text)  # remove punctuation except dot and placeholders
+    return " ".join(text.split())  # collapse whitespace
+
+
+class LookupService:
+    """
+    Single entry point for error DB lookups.
+
+    - Owns normalization: keys and OCR text go through normalize_text with
+      the configured Canonicalizer.
+    - Keeps the parsed DB and its ErrorMatcher index in memory and only
+      rebuilds them when the store file's mtime/size changes on disk.
+    - Serves repeated lookups of the same normalized text from a bounded
+      LRU result cache (misses are cached too).
+    - Optionally (retrieval mode "semantic") consults an EmbeddingIndex
+      between the exact-substring and fuzzy passes, so paraphrased errors
+      (different path, line number, wording) still hit the DB.
+    - With an AITier, new (AI-generated) solutions go to that bounded tier
+      instead of the curated store; curated keys win over AI keys, hits on
+      AI entries are counted for eviction, and evicted keys leave the index.
     """
-    return (
-        text.lower()
-        .replace("\n", " ")
-        .replace("\r", " ")
-        .replace("’", "'")
-        .strip()
-    )
+
+    def __init__(self, store=None, cache_size: int = 256, threshold: float = 0.6,
+                 semantic_index=None, semantic_threshold: float = 0.82, semantic_top_k: int = 5,
+                 canonicalizer=None, ai_tier=None):
+        self.store = store or get_store()
+        self.ai_tier = ai_tier
+        self._ai_keys = {}      # normalized key -> AI tier key
+        self.canonicalizer = canonicalizer or _default_canonicalizer
+        self.cache_size = cache_size
+        self.threshold = threshold
+        self.semantic_index = semantic_index
+        self.semantic_threshold = semantic_threshold
+        self.semantic_top_k = semantic_top_k
+        self.semantic_hits = 0
+        self._index_dirty = False
+        self._index_retry_at = 0.0
+        self._lock = threading.RLock()
+        self._matcher = None
+        self._signature = None
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.db_hits = 0
+        self.db_misses = 0
+        self.reloads = 0
+
+    def normalize(self, text: str) -> str:
+        return normalize_text(text, self.canonicalizer)
+
+    def _file_signature(self):
+        # The curated JSON is watched too, so edits to it are re-imported
+        paths = [self.store.path, getattr(self.store, "legacy_path", None)]
+        if self.ai_tier is not None:
+            paths.append(self.ai_tier.path)
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except (OSError, TypeError):
+                signature.append(None)
+                continue
+            signature.append((st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _split_ai_entries(self, entries: dict) -> dict:
+        """
+        One-time move of AI answers stored before tiers existed out of the
+        curated store into the AI tier. Returns the curated entries.
+        """
+        moved = {k: v for k, v in entries.items() if isinstance(v, dict) and v.get("category") == AI_CATEGORY}
+        for key, value in moved.items():
+            self.ai_tier.put(key, value)
+            self.store.delete(key)
+        if moved:
+            logger.info(f"Moved {len(moved)} AI-generated entries to {self.ai_tier.path}")
+        return {k: v for k, v in entries.items() if k not in moved}
+
+    def _refresh(self):
+        signature = self._file_signature()
+        if self._matcher is not None and signature == self._signature:
+            return
+        entries = self.store.reload() if self._matcher is not None else self.store.load()
+        matcher = ErrorMatcher(threshold=self.threshold)
+        for key, value in entries.items():
+            matcher.add(self.normalize(key), value)
+        self._ai_keys = {}
+        if self.ai_tier is not None:
+            if not self.ai_tier.exists():
+                entries = self._split_ai_entries(entries)
+                matcher = ErrorMatcher(db={self.normalize(k): v for k, v in entries.items()},
+                                       threshold=self.threshold)
+            for key, value in self.ai_tier.load().items():
+                normalized = self.normalize(key)
+                if normalized not in matcher:    # curated entries win
+                    matcher.add(normalized, value)
+                    self._ai_keys[normalized] = key
+        self._matcher = matcher
+        # Embedding happens outside the lock, see _sync_index()
+        self._index_dirty = self.semantic_index is not None
+        self._index_retry_at = 0.0
+        # The first load may have created the file (migration)
+        self._signature = self._file_signature()
+        self._cache.clear()
+        self.reloads += 1
+
+    def warm(self):
+        """
+        Load the DB, build the match index and (in semantic mode) embed the
+        keys now instead of on the first lookup.
+        """
+        with self._lock:
+            self._refresh()
+        self._sync_index()
+
+    def lookup(self, text: str):
+        """
+        Return the best Match for raw OCR text, or None.
+        """
+        with metrics.timer("db_lookup"):
+            return self._lookup(text)
+
+    def _sync_index(self):
+        """
+        Bring the embedding index in line with the matcher keys. Runs outside
+        self._lock (embedding is an HTTP call); on failure the index stays
+        dirty and is retried after INDEX_RETRY seconds.
+        """
+        if self.semantic_index is None:
+            return
+        with self._lock:
+            if not self._index_dirty or time.monotonic() < self._index_retry_at:
+                return
+            self._index_dirty = False
+            keys = self._matcher.keys()
+        try:
+            self.semantic_index.sync(keys)
+        except Exception as e:
+            logger.warning(f"Could not update embedding index: {e}")
+            with self._lock:
+                self._index_dirty = True
+                self._index_retry_at = time.monotonic() + INDEX_RETRY
+
+    def _lookup(self, text: str):
+        normalized = self.normalize(text)
+        with self._lock:
+            self._refresh()
+            matcher = self._matcher
+            cached = normalized in self._cache
+            if cached:
+                self._cache.move_to_end(normalized)
+                self.cache_hits += 1
+                match = self._cache[normalized]
+            else:
+                self.cache_misses += 1
+                match = matcher.match(normalized)
+
+        semantic = False
+        if not cached and self.semantic_index is not None and (match is None or match.kind != "exact"):
+            # Network call: done without the lock, against this matcher snapshot
+            self._sync_index()
+            semantic_match = self._semantic_match(matcher, normalized)
+            if semantic_match is not None:
+                match, semantic = semantic_match, True
+
+        dropped = []
+        with self._lock:
+            # Expired AI entries stop matching right away, not at the next write
+            while match is not None and match.key in self._ai_keys and matcher is self._matcher:
+                if not self.ai_tier.expire(self._ai_keys[match.key]):
+                    break
+                dropped += self._drop_ai_keys([self._ai_keys[match.key]])
+                self._signature = self._file_signature()
+                self._cache.clear()
+                cached, semantic = False, False
+                match = matcher.match(normalized)
+            if not cached and matcher is self._matcher:
+                self._cache[normalized] = match
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            if semantic:
+                self.semantic_hits += 1
+            if match is None:
+                self.db_misses += 1
+            else:
+                self.db_hits += 1
+                if match.key in self._ai_keys and self.ai_tier.touch(self._ai_keys[match.key]):
+                    # Our own hit-count flush is not an external change
+                    self._signature = self._file_signature()
+        self._unindex(dropped)
+        return match
+
+    def _semantic_match(self, matcher, normalized: str):
+        try:
+            candidates = self.semantic_index.search(normalized, self.semantic_top_k)
+        except Exception as e:
+            logger.warning(f"Semantic lookup failed, using fuzzy result: {e}")
+            return None
+        for key, score in candidates:
+            value = matcher.get(key)
+            if value is not None and score >= self.semantic_threshold:
+                return Match(key, value, score, "semantic")
+        return None
+
+    def add(self, text: str, value: dict) -> str:
+        """
+        Persist a new solution keyed by the normalized text and index it.
+        Returns the key that was stored.
+        """
+        key = self.normalize(text)
+        dropped = []
+        with self._lock:
+            self._refresh()
+            if self.ai_tier is None:
+                self.store.put(key, value)
+                self._matcher.add(key, value)
+            else:
+                evicted = self.ai_tier.put(key, value)
+                if key not in self._matcher or key in self._ai_keys:
+                    self._matcher.add(key, value)
+                    self._ai_keys[key] = key
+                dropped = self._drop_ai_keys(evicted)
+            # Our own append is not an external change
+            self._signature = self._file_signature()
+            # Earlier misses may now match
+            self._cache.clear()
+        if self.semantic_index is not None:
+            try:
+                self.semantic_index.add(key)
+            except Exception as e:
+                logger.warning(f"Could not embed new DB key: {e}")
+                with self._lock:
+                    self._index_dirty = True
+        self._unindex(dropped)
+        return key
+
+    def _drop_ai_keys(self, tier_keys) -> list:
+        """
+        Remove evicted / expired AI tier keys from the matcher. Returns the
+        normalized keys, for _unindex() once the lock is released.
+        """
+        tier_keys = set(tier_keys)
+        removed = []
+        for normalized, key in list(self._ai_keys.items()):
+            if key in tier_keys:
+                del self._ai_keys[normalized]
+                self._matcher.remove(normalized)
+                removed.append(normalized)
+        return removed
+
+    def _unindex(self, keys):
+        # Targeted removal, no embedding calls; runs outside self._lock
+        if not keys or self.semantic_index is None:
+            return
+        try:
+            self.semantic_index.remove(keys)
+        except Exception as e:
+            logger.warning(f"Could not update embedding index: {e}")
+            with self._lock:
+                self._index_dirty = True
+
+    def entries(self) -> dict:
+        """
+        Curated entries plus (when tiered) the live AI entries.
+        """
+        with self._lock:
+            self._refresh()
+            entries = {}
+            if self.ai_tier is not None:
+                entries.update(self.ai_tier.load())
+            entries.update(self.store.load())
+            return entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._matcher) if self._matcher is not None else 0,
+                "cache_size": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "db_hits": self.db_hits,
+                "db_misses": self.db_misses,
+                "reloads": self.reloads,
+                "semantic_hits": self.semantic_hits,
+                "ai_entries": len(self._ai_keys),
+                "ai_evictions": self.ai_tier.evictions + self.ai_tier.expirations if self.ai_tier is not None else 0,
+            }
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build the service from config.json ("retrieval" and "ai_tier"
+        sections, plus the "ollama" base URL for embeddings).
+        """
+        retrieval = config.get("retrieval", {})
+        tier = config.get("ai_tier", {})
+        semantic_index = None
+        if retrieval.get("mode") == "semantic":
+            from src.ai_module.embeddings import EmbeddingIndex, OllamaEmbedder
+            embedder = OllamaEmbedder(
+                base_url=config.get("ollama", {}).get("base_url", "http://localhost:11434"),
+                model=retrieval.get("embedding_model", "nomic-embed-text"),
+            )
+            semantic_index = EmbeddingIndex(embedder)
+        return cls(
+            cache_size=retrieval.get("cache_size", 256),
+            threshold=retrieval.get("fuzzy_threshold", 0.6),
+            semantic_index=semantic_index,
+            semantic_threshold=retrieval.get("semantic_threshold", 0.82),
+            semantic_top_k=retrieval.get("top_k", 5),
+            canonicalizer=Canonicalizer.from_config(config.get("canonicalize", {})),
+            ai_tier=AITier.from_config(tier) if tier.get("enabled", True) else None,
+        )
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service(config: dict = None) -> LookupService:
+    """
+    Process-wide lookup service; `config` (the full config.json dict) is only
+    used by the first call.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = LookupService.from_config(config or {})
+        return _service
 
 
 def load_db() -> dict:
-    if not os.path.exists(DB_FILE):
-        return {}
-    with open(DB_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_service().entries()
 
 
 def find_error_solution(text: str):
     """
     Returns solution dict if found, else None
     """
-    db = load_db()
-    normalized = normalize_text(text)
-
-    for key, value in db.items():
-        if key in normalized:
-            return value
-
-    return None
+    match = get_service().lookup(text)
+    return match.value if match else None
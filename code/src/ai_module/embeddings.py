@@ -0,0 +1,170 @@
+import json
+import os
+import logging
+import threading
+
+import numpy as np
+import requests
+
+from src.ai_module.store import atomic_write
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.dirname(__file__))
+INDEX_FILE = os.path.join(SRC_DIR, 'errors_db.embeddings.npy')
+KEYS_FILE = os.path.join(SRC_DIR, 'errors_db.embeddings.json')
+
+
+class OllamaEmbedder:
+    """
+    Turns text into vectors with a local Ollama embedding model.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:11434", model: str = "nomic-embed-text",
+                 timeout: float = 30, batch_size: int = 64):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        self._batch_api = True
+
+    def embed(self, texts: list) -> np.ndarray:
+        """
+        Return a float32 matrix with one row per text.
+        Uses the batched /api/embed endpoint and falls back to one
+        /api/embeddings call per text on older Ollama versions.
+        """
+        rows = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            if self._batch_api:
+                response = self.session.post(
+                    f"{self.base_url}/api/embed",
+                    json={"model": self.model, "input": batch},
+                    timeout=self.timeout,
+                )
+                if response.status_code == 404:
+                    self._batch_api = False
+                else:
+                    response.raise_for_status()
+                    rows.extend(response.json()["embeddings"])
+                    continue
+            for text in batch:
+                response = self.session.post(
+                    f"{self.base_url}/api/embeddings",
+                    json={"model": self.model, "prompt": text},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+                rows.append(response.json()["embedding"])
+        return np.asarray(rows, dtype=np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingIndex:
+    """
+    Unit-normalized float32 matrix of DB key embeddings, saved next to the DB.
+    A lookup is one matrix-vector product (cosine similarity) plus a top-k.
+    New keys are embedded incrementally; the matrix is never rebuilt from
+    scratch unless the embedding model changes.
+    """
+
+    def __init__(self, embedder, path: str = INDEX_FILE, keys_path: str = KEYS_FILE):
+        self.embedder = embedder
+        self.path = path
+        self.keys_path = keys_path
+        self._lock = threading.Lock()
+        self.keys = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.path) and os.path.exists(self.keys_path)):
+            return
+        try:
+            with open(self.keys_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring embedding index: {e}")
+            return
+        if meta.get("model") != self.embedder.model or len(meta.get("keys", [])) != len(matrix):
+            return
+        self.keys = meta["keys"]
+        self.matrix = matrix.astype(np.float32, copy=False)
+
+    def _save(self):
+        tmp = self.path + ".tmp.npy"
+        np.save(tmp, self.matrix)
+        os.replace(tmp, self.path)
+        atomic_write(self.keys_path, json.dumps({"model": self.embedder.model, "keys": self.keys}))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def sync(self, keys):
+        """
+        Make the index cover exactly `keys`: embed the new ones, drop the
+        removed ones.
+        """
+        wanted = list(dict.fromkeys(keys))
+        with self._lock:
+            present = set(self.keys)
+            missing = [k for k in wanted if k not in present]
+            wanted_set = set(wanted)
+            keep = [i for i, k in enumerate(self.keys) if k in wanted_set]
+            changed = bool(missing) or len(keep) != len(self.keys)
+            if not changed:
+                return
+            keys = [self.keys[i] for i in keep]
+            matrix = self.matrix[keep] if keep else None
+            if missing:
+                logger.info(f"Embedding {len(missing)} new DB keys...")
+                new_rows = _normalize_rows(self.embedder.embed(missing))
+                matrix = new_rows if matrix is None else np.vstack([matrix, new_rows])
+                keys.extend(missing)
+            self.keys = keys
+            self.matrix = matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32)
+            self._save()
+
+    def add(self, key: str):
+        with self._lock:
+            if key in self.keys:
+                return
+            row = _normalize_rows(self.embedder.embed([key]))
+            self.matrix = row if not self.keys else np.vstack([self.matrix, row])
+            self.keys.append(key)
+            self._save()
+
+    def remove(self, keys):
+        """
+        Drop `keys` from the index (no embedding calls).
+        """
+        drop = set(keys)
+        with self._lock:
+            keep = [i for i, k in enumerate(self.keys) if k not in drop]
+            if len(keep) == len(self.keys):
+                return
+            self.keys = [self.keys[i] for i in keep]
+            self.matrix = self.matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+            self._save()
+
+    def search(self, text: str, k: int = 5) -> list:
+        """
+        Return up to k (key, cosine score) pairs, best first.
+        """
+        if not self.keys:
+            return []
+        query = _normalize_rows(self.embedder.embed([text]))[0]
+        with self._lock:
+            scores = self.matrix @ query
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.keys[i], float(scores[i])) for i in top]
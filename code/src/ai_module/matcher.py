@@ -0,0 +1,136 @@
+import difflib
+import heapq
+from collections import defaultdict, namedtuple
+
+# kind is "exact" for a substring hit, "fuzzy" for a SequenceMatcher hit and
+# "semantic" for an embedding-similarity hit (see ai_module.embeddings)
+Match = namedtuple("Match", ["key", "value", "score", "kind"])
+
+NGRAM = 3
+
+
+def _ngrams(text: str) -> set:
+    if len(text) < NGRAM:
+        return set()
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class ErrorMatcher:
+    """
+    In-memory index over the error DB keys.
+
+    Keys are indexed by character trigrams. A lookup walks the postings of the
+    query's trigrams once, which gives:
+    - the keys that can possibly be a substring of the query (all of their
+      trigrams are present), checked with a plain `in`
+    - a cheap overlap score used to pick the top-k fuzzy candidates, so the
+      expensive SequenceMatcher only runs on a handful of keys
+    """
+
+    def __init__(self, db: dict = None, threshold: float = 0.6, top_k: int = 20):
+        self.threshold = threshold
+        self.top_k = top_k
+        self._keys = []         # position -> key (DB order)
+        self._values = []       # position -> solution dict
+        self._grams = []        # position -> trigram set of the key
+        self._positions = {}    # key -> position
+        self._postings = defaultdict(set)
+        self._short = set()     # keys too short to have trigrams
+        if db:
+            for key, value in db.items():
+                self.add(key, value)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def get(self, key: str):
+        pos = self._positions.get(key)
+        return None if pos is None else self._values[pos]
+
+    def keys(self):
+        return list(self._positions)
+
+    def add(self, key: str, value: dict):
+        """
+        Insert or replace a single entry without rebuilding the index.
+        """
+        pos = self._positions.get(key)
+        if pos is not None:
+            self._values[pos] = value
+            return
+
+        pos = len(self._keys)
+        grams = _ngrams(key)
+        self._keys.append(key)
+        self._values.append(value)
+        self._grams.append(grams)
+        self._positions[key] = pos
+        if grams:
+            for g in grams:
+                self._postings[g].add(pos)
+        else:
+            self._short.add(pos)
+
+    def remove(self, key: str):
+        pos = self._positions.pop(key, None)
+        if pos is None:
+            return
+        for g in self._grams[pos]:
+            self._postings[g].discard(pos)
+        self._short.discard(pos)
+        # Leave a tombstone so positions (and therefore DB order) stay stable
+        self._keys[pos] = None
+        self._values[pos] = None
+        self._grams[pos] = set()
+
+    def match(self, normalized: str):
+        """
+        Return the best Match for already-normalized text, or None.
+
+        An exact substring hit always wins, and among those the earliest key in
+        DB order is returned (same as the old linear scan). Otherwise the fuzzy
+        candidate with the highest ratio above the threshold is returned.
+        """
+        query_grams = _ngrams(normalized)
+
+        shared = defaultdict(int)
+        for g in query_grams:
+            for pos in self._postings.get(g, ()):
+                shared[pos] += 1
+
+        # Exact path: only keys whose trigrams all appear can be substrings
+        exact = [pos for pos, n in shared.items() if n == len(self._grams[pos])]
+        exact.extend(self._short)
+        for pos in sorted(exact):
+            key = self._keys[pos]
+            if key is not None and key in normalized:
+                return Match(key, self._values[pos], 1.0, "exact")
+
+        # Fuzzy path: rank by trigram overlap (Dice), score top-k for real
+        n_query = len(query_grams)
+        candidates = heapq.nlargest(
+            self.top_k,
+            shared.items(),
+            key=lambda item: 2.0 * item[1] / (len(self._grams[item[0]]) + n_query),
+        )
+
+        best = None
+        best_ratio = self.threshold
+        matcher = difflib.SequenceMatcher(None, "", normalized)
+        for pos, _ in candidates:
+            matcher.set_seq1(self._keys[pos])
+            # Upper bounds first; they are much cheaper than ratio()
+            if matcher.real_quick_ratio() <= best_ratio:
+                continue
+            if matcher.quick_ratio() <= best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best, best_ratio = pos, ratio
+
+        if best is None:
+            return None
+        return Match(self._keys[best], self._values[best], best_ratio, "fuzzy")
@@ -0,0 +1,108 @@
+import re
+
+# Static instructions, sent as the Ollama "system" field. It is identical on
+# every call, so with the model kept loaded (keep_alive) Ollama can reuse the
+# already-evaluated prefix instead of re-reading it each time.
+SYSTEM_PROMPT = """You are a technical troubleshooting assistant for students with basic computer knowledge.
+For the captured screen text:
+1. Say what the error is about. If it is not an error, say so, explain why and stop.
+2. Explain the root cause in simple technical terms.
+3. Give clear step-by-step fixes; if several exist, order them safest first.
+No unnecessary theory.
+
+Output format:
+ERROR SUMMARY:
+<short explanation>
+
+POSSIBLE CAUSES:
+- cause
+
+STEP-BY-STEP FIX:
+1. step
+
+WARNINGS (if any):
+- warning"""
+
+# Lines that usually carry the actual error in a dialog / console capture
+ERROR_PATTERN = re.compile(
+    r"error|exception|traceback|fail|fatal|denied|refused|cannot|can't|could not|"
+    r"unable|not found|missing|invalid|unexpected|timed? ?out|crash|warning|"
+    r"\b0x[0-9a-f]+\b|\bcode\s*[:=]?\s*-?\d+|\bat\s+\S+\(|line \d+",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token for English / code).
+    """
+    return (len(text) + 3) // 4
+
+
+def extract_error_lines(text: str, token_budget: int = 256, context: int = 1) -> str:
+    """
+    Reduce OCR text to the lines that matter, within `token_budget`.
+
+    Lines matching ERROR_PATTERN are kept together with `context` lines
+    around them, in their original order; if nothing looks like an error the
+    text is kept from the top. Blank lines and repeated lines are dropped.
+    """
+    lines = []
+    seen = set()
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line and line not in seen:
+            seen.add(line)
+            lines.append(line)
+    if not lines:
+        return ""
+    if estimate_tokens("\n".join(lines)) <= token_budget:
+        return "\n".join(lines)
+
+    hits = [i for i, line in enumerate(lines) if ERROR_PATTERN.search(line)]
+    # Error lines first (with their context), then whatever else fits
+    order = list(hits)
+    for i in hits:
+        order.extend(range(max(0, i - context), min(len(lines), i + context + 1)))
+    order.extend(range(len(lines)))
+
+    chosen = set()
+    used = 0
+    for i in order:
+        if i in chosen:
+            continue
+        cost = estimate_tokens(lines[i]) + 1
+        if used + cost <= token_budget:
+            chosen.add(i)
+            used += cost
+    if not chosen:
+        # Every candidate line alone is over budget: keep the head of the first
+        return lines[order[0]][:token_budget * 4]
+    return "\n".join(lines[i] for i in sorted(chosen))
+
+
+class PromptBuilder:
+    """
+    Builds the (system, prompt) pair for an AI fallback call: the static
+    SYSTEM_PROMPT plus a short user prompt holding only the error-bearing
+    part of the OCR text.
+    """
+
+    def __init__(self, system_prompt: str = SYSTEM_PROMPT, token_budget: int = 256, context_lines: int = 1):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.context_lines = context_lines
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        "prompt" section of config.json.
+        """
+        return cls(
+            token_budget=config.get("token_budget", 256),
+            context_lines=config.get("context_lines", 1),
+        )
+
+    def build(self, ocr_text: str) -> tuple:
+        excerpt = extract_error_lines(ocr_text, self.token_budget, self.context_lines)
+        return self.system_prompt, f"Captured text:\n{excerpt}"
@@ -0,0 +1,363 @@
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples, pct: float):
+    """
+    Nearest-rank percentile of `samples` (None when empty).
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100.0 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class BackendHealth:
+    """
+    Rolling health of one backend: first-token latencies and outcomes of the
+    last `window` requests, plus a circuit breaker.
+
+    The breaker opens after `failure_threshold` consecutive failures (errors
+    or missed first-token deadlines) and stays open for `cooldown` seconds.
+    After that it is half-open: a single trial request at a time is let
+    through (try_acquire_trial), success closes the breaker, another failure
+    re-opens it straight away.
+    """
+
+    def __init__(self, window: int = 50, failure_threshold: int = 3, cooldown: float = 30):
+        self.latencies = deque(maxlen=window)   # first-token latency in ms
+        self.outcomes = deque(maxlen=window)    # True = success
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.open_until = None
+        self.trial_running = False
+
+    def state(self) -> str:
+        """
+        "closed", "open" or "half-open". Does not change anything.
+        """
+        if self.open_until is None:
+            return "closed"
+        if time.monotonic() < self.open_until:
+            return "open"
+        return "half-open"
+
+    def can_try(self) -> bool:
+        """
+        Would try_acquire_trial() admit a request right now?
+        """
+        state = self.state()
+        return state == "closed" or (state == "half-open" and not self.trial_running)
+
+    def try_acquire_trial(self) -> bool:
+        """
+        Admit one request: always when closed, never when open, and only one
+        in-flight trial when half-open. An admitted trial must end with
+        record_success(), record_failure() or release_trial().
+        """
+        if not self.can_try():
+            return False
+        if self.state() == "half-open":
+            self.trial_running = True
+        return True
+
+    def release_trial(self):
+        """
+        The trial ended without a verdict (e.g. cancelled); admit another.
+        """
+        self.trial_running = False
+
+    def record_latency(self, ms: float):
+        self.latencies.append(ms)
+
+    def record_success(self):
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self.open_until = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.trial_running or self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.cooldown
+            self.trial_running = False
+
+    @property
+    def p50(self):
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95(self):
+        return percentile(self.latencies, 95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def as_dict(self) -> dict:
+        return {
+            "p50_ms": self.p50,
+            "p95_ms": self.p95,
+            "error_rate": self.error_rate,
+            "samples": len(self.outcomes),
+            "circuit": self.state(),
+        }
+
+
+class _Attempt:
+    """
+    One backend call running on its own thread.
+    """
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+        self.cancel = threading.Event()
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.recorded = False
+
+
+class ModelRouter:
+    """
+    Holds several LLM backends (MistralClient, AzureClient, ...) behind the
+    same generate() interface.
+
+    - Each request goes to the fastest healthy backend (lowest rolling p50
+      first-token latency; backends without samples yet are tried first so
+      every backend gets measured).
+    - If that backend hasn't produced a token within `hedge_after` seconds
+      the next one is fired as well; whichever streams first wins and the
+      other is cancelled.
+    - A backend that errors is failed over to the next one immediately.
+    - Per-backend circuit breakers (see BackendHealth) take backends that
+      keep failing or timing out out of rotation for a while.
+    """
+
+    def __init__(self, backends, hedge_after: float = 2.0, window: int = 50,
+                 failure_threshold: int = 3, cooldown: float = 30):
+        """
+        Args:
+            backends (list): (name, client) pairs in priority order
+            hedge_after (float): first-token deadline in seconds before a
+                second backend is fired (None disables hedging)
+        """
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+        self.backends = list(backends)
+        self.hedge_after = hedge_after
+        self.health = {
+            name: BackendHealth(window, failure_threshold, cooldown) for name, _ in self.backends
+        }
+        self._lock = threading.Lock()
+        self.last_backend = None
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a router from config.json: the "router" section names the
+        backends in priority order ("ollama", "azure"), each built from its
+        own section. Backends that can't be created are skipped.
+        """
+        router_config = config.get("router", {})
+        backends = []
+        for name in router_config.get("backends", ["ollama"]):
+            try:
+                if name == "ollama":
+                    from src.ai_module.client import get_mistral_client
+                    backends.append((name, get_mistral_client(config.get("ollama", {}))))
+                elif name == "azure":
+                    from src.ai_module.azure_client import get_azure_client
+                    backends.append((name, get_azure_client(config.get("azure", {}))))
+                else:
+                    logger.warning(f"Unknown LLM backend '{name}' in router config.")
+            except Exception as e:
+                logger.warning(f"Skipping LLM backend '{name}': {e}")
+        return cls(
+            backends,
+            hedge_after=router_config.get("hedge_after", 2.0),
+            window=router_config.get("window", 50),
+            failure_threshold=router_config.get("failure_threshold", 3),
+            cooldown=router_config.get("cooldown", 30),
+        )
+
+    def ranked(self) -> list:
+        """
+        Available backends, best first. Read-only: the circuit trial is only
+        taken when a backend is actually called (see _launch).
+        """
+        with self._lock:
+            available = [
+                (i, name, client) for i, (name, client) in enumerate(self.backends)
+                if self.health[name].can_try()
+            ]
+            def rank(item):
+                p50 = self.health[item[1]].p50
+                return (p50 if p50 is not None else -1.0, item[0])
+            return [(name, client) for _, name, client in sorted(available, key=rank)]
+
+    def _launch(self, name, client, events, prompt, max_tokens, system):
+        """
+        Start a call to `name`, or return None when its circuit no longer
+        admits one (another caller took the half-open trial meanwhile).
+        """
+        with self._lock:
+            if not self.health[name].try_acquire_trial():
+                return None
+        attempt = _Attempt(name, client)
+
+        def on_token(token):
+            events.put(("token", attempt, token))
+
+        def run():
+            try:
+                result = client.generate(prompt, max_tokens, on_token=on_token,
+                                         cancel=attempt.cancel, system=system)
+            except Exception as e:
+                logger.exception(f"Backend '{name}' raised.")
+                result = {"error": str(e)}
+            events.put(("done", attempt, result))
+
+        threading.Thread(target=run, name=f"llm-{name}", daemon=True).start()
+        return attempt
+
+    def _launch_next(self, pending, running, events, prompt, max_tokens, system) -> bool:
+        """
+        Launch the first pending backend that admits a call.
+        """
+        while pending:
+            name, client = pending.popleft()
+            attempt = self._launch(name, client, events, prompt, max_tokens, system)
+            if attempt is not None:
+                running.append(attempt)
+                return True
+        return False
+
+    def _release(self, attempt):
+        # Cancelled without a verdict: give back a half-open trial
+        if not attempt.recorded:
+            with self._lock:
+                self.health[attempt.name].release_trial()
+
+    def _record(self, attempt, ok: bool):
+        attempt.recorded = True
+        with self._lock:
+            health = self.health[attempt.name]
+            if attempt.first_token_at is not None:
+                health.record_latency((attempt.first_token_at - attempt.started) * 1000)
+            if ok:
+                health.record_success()
+            else:
+                health.record_failure()
+                if health.state() == "open":
+                    logger.warning(f"Circuit open for LLM backend '{attempt.name}'.")
+
+    def generate(self, prompt: str, max_tokens: int = 256, on_token=None, cancel=None,
+                 system: str = None) -> dict:
+        candidates = self.ranked()
+        if not candidates:
+            return {"error": "No LLM backend available (all circuits open)"}
+        pending = deque(candidates)
+        events = queue.Queue()
+        running = []
+        winner = None
+        text = ""
+
+        if not self._launch_next(pending, running, events, prompt, max_tokens, system):
+            return {"error": "No LLM backend available (all circuits open)"}
+        hedge_at = time.perf_counter() + self.hedge_after if self.hedge_after is not None else None
+
+        def drop_losers():
+            now = time.perf_counter()
+            for attempt in running:
+                if attempt is not winner:
+                    attempt.cancel.set()
+                    if self.hedge_after is not None and now - attempt.started >= self.hedge_after:
+                        # It missed the first-token deadline
+                        self._record(attempt, False)
+                    else:
+                        self._release(attempt)
+
+        while running:
+            if cancel is not None and cancel.is_set():
+                for attempt in running:
+                    attempt.cancel.set()
+                    self._release(attempt)
+                return {"response": text, "cancelled": True}
+
+            timeout = 0.1
+            if winner is None and hedge_at is not None and pending:
+                timeout = max(0.0, min(timeout, hedge_at - time.perf_counter()))
+            try:
+                kind, attempt, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                if winner is None and hedge_at is not None and pending and time.perf_counter() >= hedge_at:
+                    if self._launch_next(pending, running, events, prompt, max_tokens, system):
+                        logger.info(f"No first token after {self.hedge_after}s, hedging with '{running[-1].name}'.")
+                        self.hedges += 1
+                    hedge_at = None
+                continue
+
+            if attempt not in running:
+                continue  # a cancelled loser finishing late
+
+            if kind == "token":
+                if winner is None:
+                    winner = attempt
+                    attempt.first_token_at = time.perf_counter()
+                    if attempt is not running[0]:
+                        self.hedge_wins += 1
+                    drop_losers()
+                    running[:] = [winner]
+                if attempt is winner:
+                    text += payload
+                    if on_token:
+                        on_token(payload)
+                continue
+
+            # kind == "done"
+            running.remove(attempt)
+            result = payload
+            failed = "error" in result
+            if attempt is winner or (not failed and not result.get("cancelled")):
+                # Success (possibly without streamed tokens) or the winner's end
+                if attempt.first_token_at is None:
+                    attempt.first_token_at = time.perf_counter()
+                winner = attempt
+                drop_losers()
+                self._record(attempt, not failed)
+                self.last_backend = attempt.name
+                return dict(result, backend=attempt.name)
+
+            self._record(attempt, False)
+            logger.warning(f"LLM backend '{attempt.name}' failed: {result.get('error')}")
+            if self._launch_next(pending, running, events, prompt, max_tokens, system):
+                self.failovers += 1
+            elif not running:
+                return dict(result, backend=attempt.name)
+
+        return {"error": "No LLM backend produced a response"}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backends": {name: health.as_dict() for name, health in self.health.items()},
+                "last_backend": self.last_backend,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "failovers": self.failovers,
+            }
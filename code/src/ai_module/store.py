@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.dirname(__file__))
+LOG_FILE = os.path.join(SRC_DIR, 'errors_db.jsonl')
+LEGACY_FILE = os.path.join(SRC_DIR, 'errors_db.json')
+
+
+def atomic_write(path: str, data: str):
+    """
+    Write a file so readers only ever see the old or the new content.
+    The data goes to a temp file in the same directory, is fsynced, and is
+    then renamed over the target.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class SolutionStore:
+    """
+    Append-only JSONL log backing the error DB.
+
+    Each line is one record:
+        {"k": key, "v": solution}   insert / replace
+        {"k": key, "d": 1}          delete
+        {"m": {"legacy": ...}}      import state of the curated JSON (see below)
+        {"m": {"legacy_delta": ...}}  change to that state by a re-import
+    Adding an entry appends one line (O(1) I/O). When the log holds too many
+    superseded records it is compacted with an atomic rewrite. A line that
+    was cut short by a crash is skipped on load.
+
+    The curated errors_db.json is imported into the log on first use and
+    re-imported whenever its content changes: entries added or edited in the
+    JSON since the last import are written to the log, entries removed from
+    it are deleted. Entries the JSON did not touch keep whatever the log
+    says. The JSON file itself is never written.
+    """
+
+    def __init__(self, path: str = LOG_FILE, legacy_path: str = LEGACY_FILE,
+                 compact_ratio: float = 2.0, min_compact_records: int = 500):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+        self._lock = threading.RLock()
+        self._entries = None
+        self._records = 0
+        self._legacy = None     # {"sha": file digest, "keys": {key: value digest}}
+
+    # ------------------------------------------------------------------
+    # Loading / migration
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _digest(data: bytes) -> str:
+        return hashlib.sha1(data).hexdigest()
+
+    def _sync_legacy(self):
+        """
+        Import what changed in the curated JSON since the last import.
+        """
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        with open(self.legacy_path, "rb") as f:
+            raw = f.read()
+        sha = self._digest(raw)
+        if self._legacy is not None and self._legacy.get("sha") == sha:
+            return
+        legacy = json.loads(raw.decode("utf-8"))
+        keys = {k: self._digest(json.dumps(v, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+                for k, v in legacy.items()}
+        meta = {"legacy": {"sha": sha, "keys": keys}}
+
+        if not os.path.exists(self.path):
+            # First run: write the whole import in one go
+            self._entries = dict(legacy)
+            self._legacy = meta["legacy"]
+            self._write_snapshot(self._entries)
+            logger.info(f"Migrated {len(legacy)} entries from {self.legacy_path}")
+            return
+
+        if self._legacy is None:
+            # Log written before imports were tracked: take the JSON as
+            # already imported and only follow changes from here on
+            self._append({"m": meta})
+            self._legacy = meta["legacy"]
+            return
+
+        previous = self._legacy.get("keys", {})
+        changed = [k for k, digest in keys.items() if previous.get(k) != digest]
+        dropped = [k for k in previous if k not in keys]
+        removed = [k for k in dropped if k in self._entries]
+        for key in changed:
+            self._append({"k": key, "v": legacy[key]})
+            self._entries[key] = legacy[key]
+        for key in removed:
+            self._append({"k": key, "d": 1})
+            del self._entries[key]
+        # Only the digests that changed, not a copy of the whole key map
+        self._append({"m": {"legacy_delta": {"sha": sha, "keys": {k: keys[k] for k in changed}, "removed": dropped}}})
+        self._legacy = meta["legacy"]
+        if changed or removed:
+            logger.info(f"Re-imported {self.legacy_path}: {len(changed)} added/changed, {len(removed)} removed")
+        self._maybe_compact()
+
+    @staticmethod
+    def _apply_meta(legacy, meta: dict):
+        """
+        Fold one meta record into the import state read so far.
+        """
+        if "legacy" in meta:
+            return meta["legacy"]
+        delta = meta.get("legacy_delta")
+        if delta is None or legacy is None:
+            return legacy
+        keys = dict(legacy.get("keys", {}))
+        keys.update(delta["keys"])
+        for key in delta["removed"]:
+            keys.pop(key, None)
+        return {"sha": delta["sha"], "keys": keys}
+
+    def _replay(self):
+        entries = {}
+        records = 0
+        legacy = None
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                for lineno, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        if "m" in record:
+                            legacy = self._apply_meta(legacy, record["m"])
+                            records += 1
+                            continue
+                        key = record["k"]
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        logger.warning(f"Skipping corrupt record at {self.path}:{lineno}")
+                        continue
+                    records += 1
+                    if record.get("d"):
+                        entries.pop(key, None)
+                    else:
+                        entries[key] = record.get("v")
+        self._entries = entries
+        self._records = records
+        self._legacy = legacy
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._replay()
+        try:
+            self._sync_legacy()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not import {self.legacy_path}: {e}")
+
+    def load(self) -> dict:
+        """
+        Return a copy of the current {key: solution} mapping.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._entries)
+
+    def reload(self) -> dict:
+        with self._lock:
+            self._entries = None
+            return self.load()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _append(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.path, "ab+") as f:
+            # If a previous crash left a partial last line, start a fresh one
+            end = f.seek(0, os.SEEK_END)
+            if end > 0:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._records += 1
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._ensure_loaded()
+            self._append({"k": key, "v": value})
+            self._entries[key] = value
+            self._maybe_compact()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._entries:
+                return
+            self._append({"k": key, "d": 1})
+            del self._entries[key]
+            self._maybe_compact()
+
+    def _write_snapshot(self, entries: dict):
+        records = [{"k": k, "v": v} for k, v in entries.items()]
+        if self._legacy is not None:
+            records.append({"m": {"legacy": self._legacy}})
+        atomic_write(self.path, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        self._records = len(records)
+
+    def _maybe_compact(self):
+        if self._records < self.min_compact_records:
+            return
+        if self._records > self.compact_ratio * max(len(self._entries), 1):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrite the log with one record per live entry.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            self._write_snapshot(self._entries)
+            logger.info(f"Compacted {self.path} to {len(self._entries)} records")
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_store() -> SolutionStore:
+    """
+    Process-wide store shared by main.py and ai_module.database, so there is
+    only ever one writer for the log file.
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SolutionStore()
+        return _default_store
@@ -0,0 +1,65 @@
+import time
+import logging
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StreamStats:
+    """
+    Timing for one streamed completion: time to first token, total time and
+    tokens/sec. Backends that report their own token counts (Ollama's
+    eval_count) can pass them to finish(); otherwise streamed chunks are
+    counted. prompt_tokens is only known when the backend reports it
+    (Ollama's prompt_eval_count).
+    """
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.end = None
+        self.chunks = 0
+        self.tokens = None
+        self.prompt_tokens = None
+
+    def on_chunk(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+
+    def finish(self, tokens: int = None, prompt_tokens: int = None) -> dict:
+        self.end = time.perf_counter()
+        self.tokens = tokens if tokens is not None else self.chunks
+        self.prompt_tokens = prompt_tokens
+        stats = self.as_dict()
+        ttft = stats["ttft_ms"]
+        ttft_text = f"{ttft:.0f} ms" if ttft is not None else "n/a"
+        prompt_text = f", prompt {prompt_tokens} tokens" if prompt_tokens is not None else ""
+        metrics.observe("llm_first_token", ttft, backend=self.backend)
+        metrics.observe("llm_total", stats["total_ms"], backend=self.backend,
+                        fields={"tokens": stats["tokens"], "prompt_tokens": prompt_tokens})
+        logger.info(
+            f"[{self.backend}] first token {ttft_text}, "
+            f"{stats['tokens']} tokens in {stats['total_ms']:.0f} ms "
+            f"({stats['tokens_per_sec']:.1f} tok/s){prompt_text}"
+        )
+        return stats
+
+    def as_dict(self) -> dict:
+        end = self.end or time.perf_counter()
+        ttft = None
+        if self.first_token_at is not None:
+            ttft = (self.first_token_at - self.start) * 1000
+        # Generation rate, measured from the first token
+        gen_time = end - (self.first_token_at or self.start)
+        tokens = self.tokens if self.tokens is not None else self.chunks
+        return {
+            "backend": self.backend,
+            "ttft_ms": ttft,
+            "total_ms": (end - self.start) * 1000,
+            "tokens": tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "tokens_per_sec": tokens / gen_time if gen_time > 0 else 0.0,
+        }
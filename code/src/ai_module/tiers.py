@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from src.ai_module.store import SRC_DIR, SolutionStore
+
+logger = logging.getLogger(__name__)
+
+AI_LOG_FILE = os.path.join(SRC_DIR, 'errors_db.ai.jsonl')
+
+# Solutions written by the AI fallback; used to move them out of the curated
+# log the first time the AI tier is created
+AI_CATEGORY = "AI-generated"
+
+
+def entry_size(key: str, value) -> int:
+    """
+    Bytes one entry takes in the log (key + JSON of the solution).
+    """
+    return len(key.encode("utf-8")) + len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+class AITier:
+    """
+    Bounded tier of the error DB for AI-generated solutions.
+
+    Entries live in their own append-only SolutionStore, each wrapped with
+    its bookkeeping:
+        {"v": solution, "created": ts, "last_hit": ts, "hits": n}
+    The tier is capped by entry count and by bytes. Entries not hit for
+    `ttl_days` expire first; after that the victim is the least recently
+    used ("lru") or least frequently used ("lfu", ties broken by recency)
+    entry. Curated entries are in a separate store and never pass through
+    here, so they are never evicted.
+
+    Hits are counted in memory and written back every `flush_every` hits
+    (and on every put), so a lookup does not cost a disk write.
+    """
+
+    def __init__(self, store: SolutionStore = None, max_entries: int = 500,
+                 max_bytes: int = 2_000_000, policy: str = "lru", ttl_days: float = None,
+                 flush_every: int = 20):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.store = store or SolutionStore(path=AI_LOG_FILE, legacy_path=None)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.flush_every = flush_every
+        self._lock = threading.RLock()
+        self._entries = None
+        self._bytes = 0
+        self._dirty = set()
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def path(self) -> str:
+        return self.store.path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.store.path)
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        entries = {}
+        for key, record in self.store.reload().items():
+            # Tolerate bare solutions (e.g. a hand-edited log)
+            if not isinstance(record, dict) or "v" not in record:
+                record = {"v": record, "created": time.time(), "last_hit": None, "hits": 0}
+            entries[key] = record
+        self._entries = entries
+        self._bytes = sum(entry_size(k, r["v"]) for k, r in entries.items())
+        self._dirty.clear()
+
+    def load(self) -> dict:
+        """
+        {key: solution} of the live entries (expired / over-cap entries are
+        evicted first). Re-reads the log; hits counted since the last flush
+        are carried over onto the re-read entries.
+        """
+        with self._lock:
+            pending = {key: self._entries[key] for key in self._dirty} if self._entries is not None else {}
+            self._entries = None
+            self._ensure_loaded()
+            for key, old in pending.items():
+                record = self._entries.get(key)
+                if record is None:
+                    continue    # deleted by whoever changed the log
+                record["hits"] = max(record["hits"], old["hits"])
+                record["last_hit"] = max(record["last_hit"] or 0, old["last_hit"] or 0) or None
+                self._dirty.add(key)
+            self._enforce()
+            self.flush()
+            return {key: record["v"] for key, record in self._entries.items()}
+
+    def __contains__(self, key):
+        with self._lock:
+            self._ensure_loaded()
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def put(self, key: str, value) -> list:
+        """
+        Insert or replace an entry. Returns the keys evicted to make room.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            now = time.time()
+            old = self._entries.get(key)
+            if old is not None:
+                self._bytes -= entry_size(key, old["v"])
+            record = {"v": value, "created": now, "last_hit": None, "hits": 0}
+            if old is not None:
+                record.update(created=old["created"], last_hit=old["last_hit"], hits=old["hits"])
+            self._entries[key] = record
+            self._bytes += entry_size(key, value)
+            self.store.put(key, record)
+            self._dirty.discard(key)
+            evicted = self._enforce(keep=key)
+            self.flush()
+            return evicted
+
+    def touch(self, key: str) -> bool:
+        """
+        Count a hit on `key`. Returns True when that caused a write.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            record = self._entries.get(key)
+            if record is None:
+                return False
+            record["hits"] += 1
+            record["last_hit"] = time.time()
+            self._dirty.add(key)
+            if len(self._dirty) >= self.flush_every:
+                self.flush()
+                return True
+            return False
+
+    def expire(self, key: str) -> bool:
+        """
+        Drop `key` if it has not been hit for `ttl_days`. Returns True when
+        it was dropped; lookups check this so an expired entry stops
+        matching without waiting for the next put() or load().
+        """
+        with self._lock:
+            self._ensure_loaded()
+            record = self._entries.get(key)
+            if record is None or not self._expired(record):
+                return False
+            self._remove(key)
+            self.expirations += 1
+            logger.info(f"AI tier: entry expired ({len(self._entries)} left)")
+            return True
+
+    def flush(self):
+        """
+        Write the pending hit counts back to the log.
+        """
+        with self._lock:
+            for key in self._dirty:
+                if key in self._entries:
+                    self.store.put(key, self._entries[key])
+            self._dirty.clear()
+
+    def _last_used(self, record) -> float:
+        return record["last_hit"] or record["created"]
+
+    def _expired(self, record, now: float = None) -> bool:
+        return bool(self.ttl) and self._last_used(record) < (now or time.time()) - self.ttl
+
+    def _victim(self, keep=None):
+        candidates = (k for k in self._entries if k != keep)
+        if self.policy == "lfu":
+            order = lambda k: (self._entries[k]["hits"], self._last_used(self._entries[k]))
+        else:
+            order = lambda k: self._last_used(self._entries[k])
+        return min(candidates, key=order, default=None)
+
+    def _remove(self, key):
+        record = self._entries.pop(key)
+        self._bytes -= entry_size(key, record["v"])
+        self._dirty.discard(key)
+        self.store.delete(key)
+
+    def _enforce(self, keep=None) -> list:
+        """
+        Drop expired entries, then evict until both caps hold. `keep` (the
+        entry just written) is never the victim.
+        """
+        removed = []
+        if self.ttl:
+            now = time.time()
+            for key in [k for k, r in self._entries.items() if k != keep and self._expired(r, now)]:
+                self._remove(key)
+                removed.append(key)
+                self.expirations += 1
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            key = self._victim(keep)
+            if key is None:
+                break
+            self._remove(key)
+            removed.append(key)
+            self.evictions += 1
+        if removed:
+            logger.info(f"AI tier: dropped {len(removed)} entries ({len(self._entries)} left, {self._bytes} bytes)")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "policy": self.policy,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    @classmethod
+    def from_config(cls, cfg: dict):
+        """
+        Build from the "ai_tier" section of config.json.
+        """
+        return cls(
+            max_entries=cfg.get("max_entries", 500),
+            max_bytes=cfg.get("max_bytes", 2_000_000),
+            policy=cfg.get("policy", "lru"),
+            ttl_days=cfg.get("ttl_days"),
+            flush_every=cfg.get("flush_every", 20),
+        )
@@ -0,0 +1,80 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+LOADING = "loading"
+READY = "ready"
+ERROR = "error"
+
+
+class ModelWarmer:
+    """
+    Preloads the Ollama model in the background at startup and keeps it
+    resident while the app runs.
+
+    The first request loads the model with keep_alive; after that a cheap
+    empty request is re-sent every `refresh` seconds (shorter than
+    keep_alive), so Ollama never hits its idle timeout while we are running
+    but still frees the memory once we are gone. `on_status(status, detail)`
+    is called on every status change (LOADING / READY / ERROR).
+    """
+
+    def __init__(self, client, refresh: float = 240, retry: float = 30, on_status=None):
+        self.client = client
+        self.refresh = refresh
+        self.retry = retry
+        self.on_status = on_status
+        self.status = None
+        self.detail = ""
+        self.load_seconds = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, client, config: dict, on_status=None):
+        """
+        "warmup" section of config.json.
+        """
+        return cls(
+            client,
+            refresh=config.get("refresh", 240),
+            retry=config.get("retry", 30),
+            on_status=on_status,
+        )
+
+    def _set_status(self, status, detail=""):
+        changed = status != self.status
+        self.status = status
+        self.detail = detail
+        if changed and self.on_status:
+            try:
+                self.on_status(status, detail)
+            except Exception:
+                logger.exception("Warm-up status callback failed.")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self._set_status(LOADING, f"loading {self.client.model}")
+        while not self._stop.is_set():
+            try:
+                result = self.client.warm_up()
+            except Exception as e:
+                logger.warning(f"Model warm-up failed: {e}")
+                self._set_status(ERROR, str(e))
+                self._stop.wait(self.retry)
+                continue
+            if self.status != READY:
+                self.load_seconds = result["seconds"]
+                logger.info(f"Model {self.client.model} ready in {result['seconds']:.1f}s "
+                            f"(load {result['load_ms']:.0f} ms).")
+            self._set_status(READY, f"{self.client.model} loaded")
+            self._stop.wait(self.refresh)
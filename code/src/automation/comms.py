@@ -1,15 +1,18 @@
-import pyperclip
-import serial
 import time
 
+# pyperclip / pyserial are imported on first use so importing this module
+# stays cheap at service start
+
 def copy_to_clipboard(text):
     try:
+        import pyperclip
         pyperclip.copy(text)
         print("Text copied to clipboard.")
     except Exception as e:
         print(f"Failed to copy to clipboard: {e}")
 
 def send_via_serial(text, port, baud_rate=9600):
+    import serial
     try:
         with serial.Serial(port, baud_rate, timeout=1) as ser:
             time.sleep(2) # Wait for connection to stabilize
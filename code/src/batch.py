@@ -0,0 +1,225 @@
+"""
+Headless batch OCR over image files and directories.
+
+Usage (from the code/ directory):
+    python -m src.batch PATH [PATH ...] [-o results.jsonl] [--workers N]
+                        [--recursive] [--ai] [--add-to-db]
+
+PATH can be an image, a directory of images, or "-" to read one path per
+line from stdin (e.g. `find archive -name '*.png' | python -m src.batch -`).
+Images are OCR'd on a process pool (one OCR engine per worker) and one JSON
+object per image is written as soon as it is done:
+
+    {"path", "text", "confidence", "unreadable",
+     "match": {"key", "kind", "score", "solution"} | null,
+     "ai": "<answer>" (with --ai, on a DB miss), "timings": {...}, "error"}
+
+--ai asks the configured LLM backends about readable images that have no
+DB match; with --add-to-db those answers are saved to the error DB, which
+is how the DB gets pre-populated from a screenshot archive.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+
+def load_config():
+    if os.path.exists(CONFIG_PATH):
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def iter_paths(inputs, recursive=False):
+    """
+    Expand files, directories and "-" (stdin) into image paths.
+    """
+    for item in inputs:
+        if item == "-":
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        elif os.path.isdir(item):
+            if recursive:
+                for root, _, files in os.walk(item):
+                    for name in sorted(files):
+                        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                            yield os.path.join(root, name)
+            else:
+                for name in sorted(os.listdir(item)):
+                    path = os.path.join(item, name)
+                    if os.path.isfile(path) and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                        yield path
+        else:
+            yield item
+
+
+# ----------------------------------------------------------------------
+# Worker process side
+# ----------------------------------------------------------------------
+_engine = None
+
+
+def _init_worker(config):
+    global _engine
+    from src.ocr_module.engine import OCREngine
+    _engine = OCREngine(
+        config.get("tesseract_cmd"),
+        backend=config.get("ocr_backend", "pytesseract"),
+        tessdata_path=config.get("tessdata_path"),
+        preprocess=config.get("preprocess"),
+        # The batch already fills every core; no nested band pools
+        tiling={"enabled": False},
+        regions=config.get("regions"),
+        quality=config.get("ocr_quality"),
+    )
+
+
+def _ocr_file(path, psm):
+    start = time.perf_counter()
+    try:
+        result = _engine.read(path, psm=psm)
+    except Exception as e:
+        return {"path": path, "text": "", "error": str(e),
+                "timings": {"ocr_ms": (time.perf_counter() - start) * 1000}}
+    timings = {"ocr_ms": (time.perf_counter() - start) * 1000}
+    timings.update({f"{step}_ms": ms for step, ms in _engine.preprocessor.last_timings.items()})
+    return {"path": path, "text": result.text, "error": None, "timings": timings,
+            "confidence": result.confidence, "unreadable": result.unreadable,
+            "ocr_passes": len(result.attempts),
+            "skipped_pixels": _engine.regions.last_stats.get("skipped_pixels", 0)}
+
+
+# ----------------------------------------------------------------------
+# Main process side
+# ----------------------------------------------------------------------
+class BatchProcessor:
+    """
+    OCR on a worker pool, DB matching (and optionally the AI fallback) in
+    the calling process, one result dict per image.
+    """
+
+    def __init__(self, config, workers=None, psm=6, ai=False, add_to_db=False, window=None):
+        self.config = config
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        # Images queued on the pool at once; paths are read only as needed
+        self.window = window or self.workers * 4
+        self.psm = psm
+        self.ai = ai
+        self.add_to_db = add_to_db
+        self._service = None
+        self._ai_client = None
+        self._prompt_builder = None
+
+    def _match(self, result):
+        from src.ai_module.database import get_service
+        if self._service is None:
+            self._service = get_service(self.config)
+        start = time.perf_counter()
+        match = self._service.lookup(result["text"])
+        result["timings"]["match_ms"] = (time.perf_counter() - start) * 1000
+        result["match"] = None if match is None else {
+            "key": match.key, "kind": match.kind, "score": round(match.score, 4), "solution": match.value,
+        }
+
+    def _ask_ai(self, result):
+        if self._ai_client is None:
+            from src.ai_module.coalesce import CoalescingClient
+            from src.ai_module.prompt import PromptBuilder
+            from src.ai_module.router import ModelRouter
+            self._ai_client = CoalescingClient.from_config(
+                ModelRouter.from_config(self.config), self.config.get("llm_dedupe", {})
+            )
+            self._prompt_builder = PromptBuilder.from_config(self.config.get("prompt", {}))
+        system, prompt = self._prompt_builder.build(result["text"])
+        start = time.perf_counter()
+        response = self._ai_client.generate(prompt, system=system)
+        result["timings"]["ai_ms"] = (time.perf_counter() - start) * 1000
+        if "error" in response:
+            result["error"] = f"AI: {response['error']}"
+            return
+        result["ai"] = response.get("response")
+        if self.add_to_db and result["ai"]:
+            result["db_key"] = self._service.add(result["text"], {
+                "category": "AI-generated",
+                "solution": result["ai"],
+            })
+
+    def run(self, paths):
+        """
+        Yield one result dict per image, in completion order. `paths` may be
+        a generator (stdin, a directory walk); it is consumed lazily, at most
+        `window` images ahead of the results.
+        """
+        paths = iter(paths)
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.config,)
+        ) as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.window:
+                    path = next(paths, None)
+                    if path is None:
+                        exhausted = True
+                    else:
+                        pending.add(pool.submit(_ocr_file, path, self.psm))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    result["match"] = None
+                    if result["text"]:
+                        self._match(result)
+                        if self.ai and result["match"] is None and not result.get("unreadable"):
+                            self._ask_ai(result)
+                    yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="images, directories or - for paths on stdin")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="OCR worker processes")
+    parser.add_argument("--recursive", action="store_true", help="walk directories recursively")
+    parser.add_argument("--psm", type=int, default=6, help="Tesseract page segmentation mode")
+    parser.add_argument("--ai", action="store_true", help="ask the LLM about images with no DB match")
+    parser.add_argument("--add-to-db", action="store_true", help="save --ai answers to the error DB")
+    args = parser.parse_args(argv)
+
+    processor = BatchProcessor(load_config(), workers=args.workers, psm=args.psm,
+                               ai=args.ai, add_to_db=args.add_to_db)
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    count = errors = matched = 0
+    try:
+        for result in processor.run(iter_paths(args.paths, args.recursive)):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+            errors += result["error"] is not None
+            matched += result["match"] is not None
+    except BrokenProcessPool:
+        # The worker initializer already printed why (usually no Tesseract)
+        print("[BATCH] OCR workers could not start.", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"[BATCH] {count} images in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f}/s), "
+          f"{matched} matched, {errors} errors", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,22 @@
 import json
 import time
+import queue
 import threading
-import keyboard
-import pystray
-from PIL import Image, ImageDraw
 import sys
 import os
-import difflib
-import re
 
-from src.ocr_module.overlay import RegionSelection
-from src.ocr_module.engine import OCREngine
-from src.automation.comms import copy_to_clipboard
-from src.ai_module.client import MistralClient
-# from src.ai_module.azure_client import AzureClient
+# Only the standard library is imported up front. keyboard / pystray are
+# imported when the hotkey and tray are set up, and everything heavy (PIL,
+# numpy, tesseract, mss, requests, tkinter, the DB) loads in
+# warm_up_services() on a background thread once those are up.
+STARTED_AT = time.perf_counter()
+
+from src import metrics
 
 # --------------------------
 # Config and DB paths
 # --------------------------
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
-DB_FILE = os.path.join(os.path.dirname(__file__), 'errors_db.json')
 
 def load_config():
     if os.path.exists(CONFIG_PATH):
@@ -36,252 +33,427 @@ TESSERACT_CMD = config.get("tesseract_cmd", r"C:\Program Files\Tesseract-OCR\tes
 icon = None
 running = True
 ocr = None
-try:
-    ocr = OCREngine(TESSERACT_CMD)
-except Exception as e:
-    print(f"OCR Engine Init Error: {e}")
 
-# --------------------------
-# Concurrency Control
-# --------------------------
-capture_event = threading.Event()
-is_processing = False
+def init_ocr():
+    global ocr
+    from src.ocr_module.engine import OCREngine
+    from src.ocr_module.cache import OCRCache
+    try:
+        ocr = OCREngine(
+            TESSERACT_CMD,
+            cache=OCRCache.from_config(config.get("ocr_cache", {})),
+            backend=config.get("ocr_backend", "pytesseract"),
+            tessdata_path=config.get("tessdata_path"),
+            preprocess=config.get("preprocess"),
+            tiling=config.get("tiling"),
+            regions=config.get("regions"),
+            quality=config.get("ocr_quality"),
+        )
+    except Exception as e:
+        print(f"OCR Engine Init Error: {e}")
 
 # --------------------------
-# Error DB Helpers
+# Concurrency Control
 # --------------------------
-def normalize_text(text: str) -> str:
-    text = text.lower()
-    text = text.replace("’", "'")
-    text = re.sub(r"[^a-z0-9.\s]", " ", text)  # remove punctuation except dot
-    return " ".join(text.split())  # collapse whitespace
+# Hotkey / tray callbacks only post commands; the main thread blocks on this
+# queue, so nothing polls and nothing heavy runs on the keyboard hook thread.
+commands = queue.Queue()
+is_selecting = False
+capture_requested_at = None
 
+# Overlay is built once and re-shown for every capture (main thread only)
+region_selector = None
 
+# Compact system prompt + only the error-bearing OCR lines (see ai_module.prompt)
+prompt_builder = None
 
-def load_db() -> dict:
-    if not os.path.exists(DB_FILE):
-        return {}
-    with open(DB_FILE, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    # normalize keys to lowercase
-    return {k.lower(): v for k, v in raw.items()}
+# Set once warm_up_services() has finished
+services_ready = threading.Event()
 
+# --------------------------
+# Error DB Helpers
+# --------------------------
 def find_error_solution(text: str):
-    db = load_db()
-    normalized = normalize_text(text)
+    from src.ai_module.database import get_service
+    service = get_service(config)
+    normalized = service.normalize(text)
 
     print("Normalized OCR:", normalized)  # debug
 
-    for key, value in db.items():
-        if key in normalized:
-            print(f"✅ Exact match for key: {key}")
-            return value
-        # fuzzy similarity
-        ratio = difflib.SequenceMatcher(None, key, normalized).ratio()
-        if ratio > 0.6:
-            print(f"🤏 Fuzzy match for key: {key} (score {ratio:.2f})")
-            return value
+    match = service.lookup(text)
+    if match is None:
+        print("❌ No match found")
+        return None
 
-    print("❌ No match found")
-    return None
+    if match.kind == "exact":
+        print(f"✅ Exact match for key: {match.key}")
+    elif match.kind == "semantic":
+        print(f"🧭 Semantic match for key: {match.key} (cosine {match.score:.2f})")
+    else:
+        print(f"🤏 Fuzzy match for key: {match.key} (score {match.score:.2f})")
+    return match.value
 
 # --------------------------
 # Tray Icon
 # --------------------------
-def create_icon_image():
+# Model load status -> status dot colour in the tray icon
+STATUS_COLORS = {
+    "loading": (255, 191, 0),
+    "ready": (0, 200, 83),
+    "error": (229, 57, 53),
+}
+model_status = None
+model_status_detail = ""
+
+def create_icon_image(status=None):
+    from PIL import Image, ImageDraw
     width = 64
     height = 64
     image = Image.new('RGB', (width, height), color=(0, 0, 0))
     dc = ImageDraw.Draw(image)
     dc.rectangle((16, 16, 48, 48), fill=(0, 0, 0))
+    if status in STATUS_COLORS:
+        dc.ellipse((40, 40, 62, 62), fill=STATUS_COLORS[status])
     return image
 
+def tray_title():
+    if model_status is None:
+        return "OCR Tool"
+    return f"OCR Tool - model {model_status}" + (f" ({model_status_detail})" if model_status_detail else "")
+
+def on_model_status(status, detail):
+    global model_status, model_status_detail
+    model_status = status
+    model_status_detail = detail
+    print(f"[MODEL] {status}: {detail}")
+    if icon:
+        icon.icon = create_icon_image(status)
+        icon.title = tray_title()
+
 def on_quit(icon_obj, item):
     global running
     running = False
+    commands.put("quit")
     icon_obj.stop()
 
 def exit_app_hotkey():
     global running
     print("Exit hotkey pressed. Exiting...")
     running = False
+    commands.put("quit")
     if icon:
         icon.stop()
 
+# --------------------------
+# Pipeline Stages (each runs on its own worker thread)
+# --------------------------
+def ocr_stage(job):
+    if not ocr:
+        init_ocr()   # warm-up may have failed; try again
+    if not ocr:
+        print("OCR engine not initialized.")
+        return False
+    result = ocr.capture(job.selection)
+    job.text = result.text
+    job.ocr_confidence = result.confidence
+    job.unreadable = result.unreadable
+    if not job.text:
+        print("No text detected. Try selecting a larger area or clearer text.")
+        return False
+    print(f"[Job {job.id}] Extracted Text: {job.text}")
+    if result.confidence is not None:
+        retried = f", {len(result.attempts) - 1} re-OCR pass(es), kept {result.variant or 'first pass'}" \
+            if len(result.attempts) > 1 else ""
+        print(f"[OCR QUALITY] mean confidence {result.confidence:.0f}{retried}")
+    if ocr.regions.last_stats.get("blocks"):
+        stats = ocr.regions.last_stats
+        print(f"[OCR REGIONS] {stats['blocks']} text blocks, skipped {stats['skipped_pixels']} px "
+              f"({stats['skipped_ratio']:.0%}) in {stats['detect_ms']:.1f} ms")
+    from src.automation.comms import copy_to_clipboard
+    copy_to_clipboard(job.text)
+    return True
+
+def match_stage(job):
+    # 🔍 Check local error DB
+    job.solution = find_error_solution(job.text)
+    if job.solution:
+        print(f"[LOCAL DB MATCH] Category: {job.solution['category']}")
+        print(f"Suggested Fix: {job.solution['solution']}")
+        return False
+    if job.unreadable:
+        # Garbage in, garbage out: not worth a slow LLM call
+        print(f"[LOCAL DB] No match, and the capture is unreadable (confidence {job.ocr_confidence:.0f}); "
+              "skipping AI. Try a tighter selection or zoom in.")
+        return False
+    print("[LOCAL DB] No match found. Using AI fallback (Ollama)...")
+    return True
+
+ai_client = None
+ai_router = None
+
+def get_ai_client():
+    # Router picks / hedges between the configured backends (Ollama, Azure);
+    # identical prompts share one request and answers are memoized
+    global ai_client, ai_router
+    if ai_client is None:
+        from src.ai_module.coalesce import CoalescingClient
+        from src.ai_module.router import ModelRouter
+        ai_router = ModelRouter.from_config(config)
+        ai_client = CoalescingClient.from_config(ai_router, config.get("llm_dedupe", {}))
+    return ai_client
+
+def ai_request_key(job):
+    # Captures that send the same prompt share one LLM request, so a newer
+    # one must not cancel it (see Stage.supersede_key)
+    system, prompt = prompt_builder.build(job.text)
+    return get_ai_client().request_key(prompt, system=system)
+
+def ai_stage(job):
+    # ---------------------------------------------------------
+    # AI Fallback (Ollama / Mistral)
+    # ---------------------------------------------------------
+    ai_client = get_ai_client()
+    system, prompt = prompt_builder.build(job.text)
+    print(f"[Job {job.id}] [AI SUGGESTION] ", end="", flush=True)
+    ai_response = ai_client.generate(
+        prompt,
+        system=system,
+        # Show the answer as it streams in
+        on_token=lambda token: print(token, end="", flush=True),
+        # Set when a newer capture needs the model
+        cancel=job.cancel_event,
+    )
+    print()
+    # Per-call timings (absent on a memo hit); the clients are shared by workers
+    stats = ai_response.get("stats")
+    if stats:
+        ttft = stats["ttft_ms"]
+        print(f"[AI TIMING] first token: {f'{ttft:.0f} ms' if ttft is not None else 'n/a'}, "
+              f"{stats['tokens_per_sec']:.1f} tokens/sec, "
+              f"prompt: {stats.get('prompt_tokens') or 'n/a'} tokens")
+    print(f"[AI DEDUPE] {ai_client.stats()}")
+    print(f"[AI ROUTER] {ai_router.stats()}")
+
+    if ai_response.get("cancelled"):
+        print(f"[Job {job.id}] AI answer cancelled.")
+        return False
+    if "error" in ai_response:
+        print(f"[AI ERROR] {ai_response['error']}")
+        return False
+    job.suggestion = ai_response.get("response") or ai_response.get("text")
+    return bool(job.suggestion)
+
+def persist_stage(job):
+    # 📝 Cache AI suggestion into local DB
+    from src.ai_module.database import get_service
+    try:
+        get_service(config).add(job.text, {
+            "category": "AI-generated",
+            "solution": job.suggestion
+        })
+        print("[CACHE] AI suggestion saved to local DB.")
+    except Exception as e:
+        print(f"[CACHE ERROR] Could not save AI suggestion: {e}")
+    return False
+
+pipeline = None
+
+def get_pipeline():
+    global pipeline
+    if pipeline is None:
+        from src.pipeline import CapturePipeline
+        pipeline = CapturePipeline([
+            ("ocr", ocr_stage),
+            ("match", match_stage),
+            ("ai", ai_stage, {"supersede": True,
+                              "supersede_key": ai_request_key,
+                              "workers": config.get("llm_dedupe", {}).get("stage_workers", 2)}),
+            ("persist", persist_stage),
+        ], maxsize=config.get("pipeline_queue_size", 4))
+    return pipeline
+
 # --------------------------
 # Capture Logic hey
 # --------------------------
 def trigger_capture():
-    global is_processing
-    if is_processing:
-        print("Capture in progress... ignoring press.")
+    global capture_requested_at
+    if is_selecting:
+        print("Selection already open... ignoring press.")
         return
     print("Hotkey triggered! Queueing capture...")
-    is_processing = True
-    capture_event.set()
+    capture_requested_at = time.perf_counter()
+    commands.put("capture")
 
 def run_capture_logic():
+    """
+    Runs on the main thread (Tk): show the overlay, then hand the selection
+    to the pipeline and return straight away.
+    """
+    global is_selecting
     print("Hotkey triggered!")
+    is_selecting = True
     try:
-        region_selector = RegionSelection()
         selection = region_selector.get_region()
+        metrics.observe("overlay_show", region_selector.last_show_ms)
+        if capture_requested_at is not None:
+            metrics.observe("hotkey_to_overlay", (time.perf_counter() - capture_requested_at) * 1000)
+            print(f"[TIMING] Hotkey to overlay: {(time.perf_counter() - capture_requested_at) * 1000:.0f} ms "
+                  f"(overlay show {region_selector.last_show_ms:.0f} ms)")
 
         if selection:
             print(f"Region selected: {selection}")
-
-            if ocr:
-                text = ocr.capture_and_extract(selection)
-
-                if text:
-                    print(f"Extracted Text: {text}")
-                    copy_to_clipboard(text)
-
-                    # 🔍 Check local error DB
-                    solution = find_error_solution(text)
-                    if solution:
-                        print(f"[LOCAL DB MATCH] Category: {solution['category']}")
-                        print(f"Suggested Fix: {solution['solution']}")
-                    else:
-                        # print("[LOCAL DB] No match found. Using AI fallback...")
-
-                        # # AI fallback
-                        # ai_client = MistralClient()
-                        # ai_response = ai_client.generate(
-                        #     f"The following error was detected: {text}. "
-                        #     f"Suggest a possible fix."
-                        # )
-
-                        # if "error" in ai_response:
-                        #     print(f"[AI ERROR] {ai_response['error']}")
-                        # else:
-                        #     suggestion = ai_response.get("response") or ai_response.get("text")
-                        #     print(f"[AI SUGGESTION] {suggestion}")
-
-                        #     # 📝 Cache AI suggestion into local DB
-                        #     try:
-                        #         db = load_db()
-                        #         normalized = normalize_text(text)
-                        #         db[normalized] = {
-                        #             "category": "AI-generated",
-                        #             "solution": suggestion
-                        #         }
-                        #         with open(DB_FILE, "w", encoding="utf-8") as f:
-                        #             json.dump(db, f, indent=4, ensure_ascii=False)
-                        #         print("[CACHE] AI suggestion saved to local DB.")
-                        #     except Exception as e:
-                        #         print(f"[CACHE ERROR] Could not save AI suggestion: {e}")
-                        
-                        print("No match found in local DB.")
-                        
-                        # ---------------------------------------------------------
-                        # AI Fallback (Ollama / Mistral)
-                        # ---------------------------------------------------------
-                        print("[LOCAL DB] No match found. Using AI fallback (Ollama)...")
-
-                        ai_client = MistralClient()
-                        ai_response = ai_client.generate(
-                        """You are a technical troubleshooting assistant.
-
-                            Your task:
-                            1. Identify what the error message is about.but some time the messge is not an error.. then jest tell it is not an error and explain why.then return
-                            2. Explain the root cause in simple technical terms.
-                            3. Provide clear, step-by-step instructions to fix the issue.
-                            4. If multiple solutions exist, list them from safest to most advanced.
-                            5. Do NOT include unnecessary theory.
-                            6. Assume the user is a student with basic computer knowledge.
-
-                            Output format MUST be:
-
-                            ERROR SUMMARY:
-                            <short explanation>
-
-                            POSSIBLE CAUSES:
-                            - cause 1
-                            - cause 2
-
-                            STEP-BY-STEP FIX:
-                            1. Step one
-                            2. Step two
-                            3. Step three
-
-                            WARNINGS (if any):
-                            - warning
-                            """
-                            f"The following error was detected: {text}. "
-                        )
-
-                        if "error" in ai_response:
-                            print(f"[AI ERROR] {ai_response['error']}")
-                        else:
-                            suggestion = ai_response.get("response") or ai_response.get("text")
-                            print(f"[AI SUGGESTION] {suggestion}")
-
-                            # 📝 Cache AI suggestion into local DB
-                            try:
-                                db = load_db()
-                                normalized = normalize_text(text)
-                                db[normalized] = {
-                                    "category": "AI-generated",
-                                    "solution": suggestion
-                                }
-                                with open(DB_FILE, "w", encoding="utf-8") as f:
-                                    json.dump(db, f, indent=4, ensure_ascii=False)
-                                print("[CACHE] AI suggestion saved to local DB.")
-                            except Exception as e:
-                                print(f"[CACHE ERROR] Could not save AI suggestion: {e}")
-                        # ---------------------------------------------------------
-
-                else:
-                    print("No text detected. Try selecting a larger area or clearer text.")
-            else:
-                print("OCR engine not initialized.")
+            if not services_ready.is_set():
+                print("Still starting up, the capture will run once OCR is ready...")
+                services_ready.wait()
+            job = get_pipeline().submit(selection)
+            print(f"[Job {job.id}] queued.")
         else:
             print("Selection cancelled.")
     except Exception as e:
         print(f"Error in capture logic: {e}")
+    finally:
+        is_selecting = False
+
+# --------------------------
+# Watch Mode (pinned region, re-OCR only what changes)
+# --------------------------
+watcher = None
+
+def trigger_watch():
+    if is_selecting:
+        print("Selection already open... ignoring press.")
+        return
+    commands.put("watch")
+
+def on_watch_lines(lines):
+    text = "\n".join(lines)
+    print(f"[WATCH] New error lines:\n{text}")
+    job = get_pipeline().submit_text(text)
+    print(f"[Job {job.id}] queued from watch mode.")
+
+def run_watch_logic():
+    """
+    Runs on the main thread: stop watching if a region is pinned, otherwise
+    let the user pick the region to pin.
+    """
+    global watcher, is_selecting
+    if watcher is not None and watcher.running:
+        watcher.stop()
+        print(f"[WATCH] Stopped. {watcher.stats()}")
+        watcher = None
+        return
+
+    is_selecting = True
+    try:
+        selection = region_selector.get_region()
+    finally:
+        is_selecting = False
+    if not selection:
+        print("Selection cancelled.")
+        return
+    services_ready.wait()
+    if not ocr:
+        print("OCR engine not initialized.")
+        return
+    from src.ocr_module.watch import RegionWatcher
+    watcher = RegionWatcher(ocr, selection, on_watch_lines, config.get("watch")).start()
+    print(f"[WATCH] Watching {selection}. Press Ctrl+Alt+Shift+W again to stop.")
 
 # --------------------------
 # Hotkeys and Tray
 # --------------------------
 def setup_hotkey():
+    import keyboard
     keyboard.add_hotkey('ctrl+alt+shift+o', trigger_capture)
+    keyboard.add_hotkey('ctrl+alt+shift+w', trigger_watch)
     keyboard.add_hotkey('ctrl+alt+shift+p', exit_app_hotkey)
 
 def start_tray_icon():
     global icon
+    import pystray
     icon = pystray.Icon("OCR Tool")
     icon.menu = pystray.Menu(pystray.MenuItem('Quit', on_quit))
-    icon.icon = create_icon_image()
-    icon.title = "OCR Tool"
+    icon.icon = create_icon_image(model_status)
+    icon.title = tray_title()
     icon.run()
 
+# --------------------------
+# Background Warm-up
+# --------------------------
+def warm_up_services(start_model=True) -> float:
+    """
+    Heavy imports and initialisation, run on a background thread after the
+    hotkey and tray are up. Returns the time it took in ms.
+    """
+    global prompt_builder
+    start = time.perf_counter()
+    try:
+        # Load the model in the background and keep it resident while we run,
+        # so the first capture doesn't pay for the model load
+        if start_model and "ollama" in config.get("router", {}).get("backends", ["ollama"]):
+            from src.ai_module.client import get_mistral_client
+            from src.ai_module.warmup import ModelWarmer
+            ModelWarmer.from_config(
+                get_mistral_client(config.get("ollama", {})),
+                config.get("warmup", {}),
+                on_status=on_model_status,
+            ).start()
+
+        from src.ai_module.prompt import PromptBuilder
+        from src.ai_module.database import get_service
+        prompt_builder = PromptBuilder.from_config(config.get("prompt", {}))
+        init_ocr()
+        get_service(config).warm()   # loads the DB and builds the match index
+        get_ai_client()
+        get_pipeline()
+    except Exception as e:
+        # Captures retry the lazy initialisation themselves and report errors
+        print(f"[STARTUP] Warm-up failed: {e}")
+    finally:
+        # Never leave a waiting capture blocked
+        services_ready.set()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"[STARTUP] Warm-up finished in {elapsed:.0f} ms "
+          f"({(time.perf_counter() - STARTED_AT) * 1000:.0f} ms after start)")
+    return elapsed
+
 # --------------------------
 # Main Loop
 # --------------------------
 def main():
+    global region_selector
+    metrics.configure(config.get("metrics", {}))
     setup_hotkey()
     print("Background OCR Service Running...")
     print("Press Ctrl+Alt+Shift+O to capture.")
+    print("Press Ctrl+Alt+Shift+W to watch a region (again to stop).")
     print("Press Ctrl+Alt+Shift+P to exit.")
-    
+    print(f"[STARTUP] Hotkey ready in {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+
     # Start tray icon in background thread
     tray_thread = threading.Thread(target=start_tray_icon, daemon=True)
     tray_thread.start()
 
-    # Loop until exit hotkey pressed
+    threading.Thread(target=warm_up_services, name="warm-up", daemon=True).start()
+
+    # Build the hidden overlay now so the first capture doesn't pay for it
+    # (Tk has to live on the main thread)
+    from src.ocr_module.overlay import RegionSelection
+    region_selector = RegionSelection()
+    region_selector.prewarm()
+
+    # Block until a hotkey / tray command arrives
     while running:
-        if capture_event.is_set():
-            capture_event.clear()
-            try:
-                run_capture_logic()
-            except Exception as e:
-                print(f"Error during capture: {e}")
-            finally:
-                is_processing = False
-        time.sleep(0.1)
+        command = commands.get()
+        if command == "quit":
+            break
+        if command == "capture":
+            run_capture_logic()
+        elif command == "watch":
+            run_watch_logic()
 
     print("Exiting program...")
     os._exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
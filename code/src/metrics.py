@@ -0,0 +1,247 @@
+"""
+Per-stage latency metrics: histograms, structured JSON logs and an optional
+Prometheus-style text endpoint.
+
+Disabled by default. While disabled, timer() hands back one shared no-op
+object and observe() returns straight away, so instrumented code pays a
+single flag check. Enable with the "metrics" section of config.json:
+
+    "metrics": {
+        "enabled": true,
+        "log_path": "metrics.jsonl",   # one JSON object per measurement (null = off)
+        "prometheus_port": 9464,       # serve /metrics on 127.0.0.1 (null = off)
+        "buckets": [5, 10, 25, ...]    # histogram bucket bounds in ms
+    }
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+SRC_DIR = os.path.dirname(__file__)
+
+DEFAULT_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+enabled = False
+
+_lock = threading.Lock()
+_histograms = {}
+_buckets = DEFAULT_BUCKETS
+_log_file = None
+_server = None
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of durations in ms (Prometheus semantics).
+    """
+
+    def __init__(self, buckets):
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)   # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum += ms
+
+    def quantile(self, q: float):
+        """
+        Upper bound of the bucket holding the q-quantile (None when empty).
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds + [float("inf")], self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start", "ms")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.ms = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            self.labels = dict(self.labels, error=exc_type.__name__)
+        observe(self.name, self.ms, **self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+    ms = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timer(stage: str, **labels):
+    """
+    Context manager that records how long its block took as `stage`:
+
+        with metrics.timer("ocr", backend="tesserocr"):
+            ...
+    """
+    if not enabled:
+        return _NOOP
+    return _Timer(stage, labels)
+
+
+def observe(stage: str, ms: float, fields: dict = None, **labels):
+    """
+    Record one duration (ms) for `stage`. Labels become histogram labels
+    (keep them low-cardinality); `fields` (job id, token counts, ...) only
+    go to the JSON log.
+    """
+    if not enabled or ms is None:
+        return
+    key = (stage, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(_buckets)
+        histogram.observe(ms)
+        if _log_file is not None:
+            record = {"ts": time.time(), "stage": stage, "ms": round(ms, 3)}
+            record.update(labels)
+            if fields:
+                record.update(fields)
+            _log_file.write(json.dumps(record, default=str) + "\n")
+            _log_file.flush()
+
+
+def snapshot() -> dict:
+    """
+    {stage: {"count", "sum_ms", "p50_ms", "p95_ms"}} over all label sets.
+    """
+    merged = {}
+    with _lock:
+        for (stage, _), histogram in _histograms.items():
+            total = merged.get(stage)
+            if total is None:
+                total = merged[stage] = Histogram(histogram.bounds)
+            total.count += histogram.count
+            total.sum += histogram.sum
+            total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+    return {
+        stage: {
+            "count": h.count,
+            "sum_ms": round(h.sum, 3),
+            "p50_ms": h.quantile(0.5),
+            "p95_ms": h.quantile(0.95),
+        }
+        for stage, h in merged.items()
+    }
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """
+    All histograms in the Prometheus text exposition format.
+    """
+    lines = [
+        "# HELP stage_duration_ms Duration of each capture / lookup / LLM stage in milliseconds.",
+        "# TYPE stage_duration_ms histogram",
+    ]
+    with _lock:
+        for (stage, labels), h in sorted(_histograms.items()):
+            base = (("stage", stage),) + labels
+            cumulative = 0
+            for bound, n in zip(h.bounds + ["+Inf"], h.counts):
+                cumulative += n
+                lines.append(f"stage_duration_ms_bucket{_label_text(base, [('le', bound)])} {cumulative}")
+            lines.append(f"stage_duration_ms_sum{_label_text(base)} {h.sum:.3f}")
+            lines.append(f"stage_duration_ms_count{_label_text(base)} {h.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _serve(port: int):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def configure(config: dict):
+    """
+    Apply the "metrics" section of config.json (see the module docstring).
+    """
+    global enabled, _buckets, _log_file, _server
+    shutdown()
+    if not config.get("enabled", False):
+        return
+    _buckets = sorted(config.get("buckets", DEFAULT_BUCKETS))
+    log_path = config.get("log_path", "metrics.jsonl")
+    if log_path:
+        if not os.path.isabs(log_path):
+            log_path = os.path.join(SRC_DIR, log_path)
+        _log_file = open(log_path, "a", encoding="utf-8")
+    port = config.get("prometheus_port")
+    if port:
+        try:
+            _server = _serve(port)
+            print(f"[METRICS] Serving http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            print(f"[METRICS] Could not start endpoint on port {port}: {e}")
+    enabled = True
+
+
+def shutdown():
+    """
+    Disable metrics, close the log file and stop the endpoint.
+    """
+    global enabled, _log_file, _server
+    enabled = False
+    with _lock:
+        _histograms.clear()
+        if _log_file is not None:
+            _log_file.close()
+            _log_file = None
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import namedtuple
+
+import pytesseract
+
+# Language data shipped with the repo (code/tesseract/tessdata)
+DEFAULT_TESSDATA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'tesseract', 'tessdata'
+)
+
+# One recognized word: confidence 0-100, box in pixels of the OCR'd image,
+# `line` groups words that Tesseract put on the same text line
+Word = namedtuple("Word", ["text", "conf", "left", "top", "width", "height", "line"])
+
+
+def words_to_text(words) -> str:
+    """
+    Rebuild plain text from words: same line joined by spaces, lines by newlines.
+    """
+    lines = []
+    current = None
+    for word in words:
+        if word.line != current:
+            lines.append([])
+            current = word.line
+        lines[-1].append(word.text)
+    return "\n".join(" ".join(line) for line in lines)
+
+
+class PytesseractBackend:
+    """
+    Runs the tesseract executable once per call (writes a temp image and
+    reloads the language data every time).
+    """
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd, lang="eng"):
+        if not os.path.exists(tesseract_cmd):
+            raise FileNotFoundError(f"Tesseract executable not found at: {tesseract_cmd}")
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.lang = lang
+
+    def image_to_string(self, img, psm=6):
+        return pytesseract.image_to_string(img, lang=self.lang, config=f"--psm {psm}")
+
+    def image_to_data(self, img, psm=6):
+        data = pytesseract.image_to_data(img, lang=self.lang, config=f"--psm {psm}",
+                                         output_type=pytesseract.Output.DICT)
+        words = []
+        for i, text in enumerate(data["text"]):
+            conf = float(data["conf"][i])
+            # conf is -1 on page / block / line rows
+            if conf < 0 or not text.strip():
+                continue
+            words.append(Word(text.strip(), conf, data["left"][i], data["top"][i],
+                              data["width"][i], data["height"][i],
+                              (data["block_num"][i], data["par_num"][i], data["line_num"][i])))
+        return words
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """
+    Keeps one libtesseract API handle alive (via tesserocr), so the
+    traineddata is loaded once and images are passed in memory.
+    """
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path=DEFAULT_TESSDATA, lang="eng"):
+        import tesserocr  # optional dependency
+
+        self._tesserocr = tesserocr
+        self._api = tesserocr.PyTessBaseAPI(path=tessdata_path, lang=lang)
+        # A single API handle must not be used from two threads at once
+        self._lock = threading.Lock()
+
+    def image_to_string(self, img, psm=6):
+        with self._lock:
+            self._api.SetPageSegMode(psm)
+            self._api.SetImage(img)
+            return self._api.GetUTF8Text()
+
+    def image_to_data(self, img, psm=6):
+        RIL = self._tesserocr.RIL
+        words = []
+        with self._lock:
+            self._api.SetPageSegMode(psm)
+            self._api.SetImage(img)
+            self._api.Recognize()
+            line = 0
+            for word in self._tesserocr.iterate_level(self._api.GetIterator(), RIL.WORD):
+                text = word.GetUTF8Text(RIL.WORD)
+                if not text or not text.strip():
+                    continue
+                if word.IsAtBeginningOf(RIL.TEXTLINE):
+                    line += 1
+                x1, y1, x2, y2 = word.BoundingBox(RIL.WORD)
+                words.append(Word(text.strip(), word.Confidence(RIL.WORD), x1, y1, x2 - x1, y2 - y1, line))
+        return words
+
+    def close(self):
+        with self._lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+
+
+BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+
+_warned = set()
+
+
+def _warn_once(message):
+    # Engines are created more than once per process (batch workers, benches)
+    if message not in _warned:
+        _warned.add(message)
+        print(message)
+
+
+def create_backend(name, tesseract_cmd, tessdata_path=None, lang="eng"):
+    """
+    Create the OCR backend selected in config.json.
+    Falls back to pytesseract when the requested backend is unavailable.
+    """
+    if name not in BACKENDS:
+        _warn_once(f"Unknown OCR backend '{name}', using pytesseract.")
+        name = PytesseractBackend.name
+
+    if name == TesserocrBackend.name:
+        try:
+            return TesserocrBackend(tessdata_path or DEFAULT_TESSDATA, lang=lang)
+        except Exception as e:  # ImportError, or RuntimeError from a bad tessdata path
+            _warn_once(f"tesserocr backend unavailable ({e}), falling back to pytesseract.")
+
+    return PytesseractBackend(tesseract_cmd, lang=lang)
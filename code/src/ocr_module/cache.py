@@ -0,0 +1,221 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from src.ai_module.store import atomic_write
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ocr_cache.json')
+
+EVICTION_POLICIES = ("lru", "lfu", "fifo")
+
+
+def dhash(img, hash_size: int = 16) -> int:
+    """
+    Difference hash of an image: shrink to (hash_size+1) x hash_size grayscale
+    and record whether each pixel is brighter than its right neighbour.
+    """
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def content_digest(img) -> str:
+    """
+    sha1 of the image mode, size and pixel buffer.
+    """
+    digest = hashlib.sha1(f"{img.mode}|{img.size[0]}x{img.size[1]}|".encode("ascii"))
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Bounded cache of OCR results keyed by a difference hash of the raw
+    captured frame, its exact size and the OCR config string (psm plus a
+    digest of the engine's preprocessing / region / quality settings).
+
+    The hash only narrows down the candidates (within `max_distance` bits);
+    cached text is returned only for a frame whose content digest (see
+    content_digest) is identical, since dialogs that differ in a single
+    character such as a line number hash alike.
+
+    Entries live in memory and are mirrored to a JSON file so repeat
+    captures survive restarts; writes are batched (at most one every
+    `save_interval` seconds, plus one at exit).
+    """
+
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = 256,
+                 max_distance: int = 3, eviction: str = "lru", hash_size: int = 16,
+                 save_interval: float = 5.0):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.eviction = eviction
+        self.hash_size = hash_size
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._last_save = 0.0
+        self._save_timer = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """
+        Build a cache from the "ocr_cache" section of config.json.
+        Returns None when the cache is disabled.
+        """
+        if not config.get("enabled", True):
+            return None
+        path = config.get("path") or CACHE_FILE
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(CACHE_FILE), path)
+        return cls(
+            path=path,
+            max_entries=config.get("max_entries", 256),
+            max_distance=config.get("max_distance", 3),
+            eviction=config.get("eviction", "lru"),
+            hash_size=config.get("hash_size", 16),
+            save_interval=config.get("save_interval", 5.0),
+        )
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"OCR cache ignored ({e})")
+            return
+        if data.get("hash_size") != self.hash_size:
+            return
+        for entry in data.get("entries", []):
+            if "digest" not in entry:
+                continue    # written before entries carried a content digest
+            self._entries[self._entry_id(entry)] = entry
+        self._evict()
+
+    def _save(self):
+        if not self.path:
+            return
+        data = {"hash_size": self.hash_size, "entries": list(self._entries.values())}
+        try:
+            atomic_write(self.path, json.dumps(data, ensure_ascii=False))
+        except OSError as e:
+            print(f"Could not save OCR cache: {e}")
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _schedule_save(self):
+        """
+        Save now if the last save is old enough, otherwise once the
+        interval has passed (called with the lock held).
+        """
+        self._dirty = True
+        if not self.path or self._save_timer is not None:
+            return
+        wait = self.save_interval - (time.monotonic() - self._last_save)
+        if wait <= 0:
+            self._save()
+            return
+        self._save_timer = threading.Timer(wait, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """
+        Write pending changes to disk.
+        """
+        with self._lock:
+            self._save_timer = None
+            if self._dirty:
+                self._save()
+
+    @staticmethod
+    def _entry_id(entry):
+        return f"{entry['size'][0]}x{entry['size'][1]}|{entry['config']}|{entry['digest']}"
+
+    def _find(self, size, config, value, digest):
+        for entry_id, entry in self._entries.items():
+            if entry["size"] != size or entry["config"] != config:
+                continue
+            if hamming(entry["hash"], value) <= self.max_distance and entry["digest"] == digest:
+                return entry_id
+        return None
+
+    def get(self, img, config: str):
+        """
+        Return cached text for a frame with exactly the content of `img`
+        (same config), or None.
+        """
+        value = dhash(img, self.hash_size)
+        digest = content_digest(img)
+        size = list(img.size)
+        with self._lock:
+            entry_id = self._find(size, config, value, digest)
+            if entry_id is None:
+                self.misses += 1
+                return None
+            entry = self._entries[entry_id]
+            entry["hits"] += 1
+            entry["last_used"] = time.time()
+            if self.eviction == "lru":
+                self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return entry["text"]
+
+    def put(self, img, config: str, text: str):
+        entry = {
+            "hash": dhash(img, self.hash_size),
+            "digest": content_digest(img),
+            "size": list(img.size),
+            "config": config,
+            "text": text,
+            "hits": 0,
+            "last_used": time.time(),
+        }
+        with self._lock:
+            entry_id = self._entry_id(entry)
+            self._entries.pop(entry_id, None)
+            self._entries[entry_id] = entry
+            self._evict()
+            self._schedule_save()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            if self.eviction == "lfu":
+                # Never evict the entry that was just inserted
+                candidates = list(self._entries)[:-1]
+                victim = min(candidates, key=lambda k: (self._entries[k]["hits"], self._entries[k]["last_used"]))
+            else:
+                # lru keeps recently used entries at the end; fifo never reorders
+                victim = next(iter(self._entries))
+            del self._entries[victim]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._schedule_save()
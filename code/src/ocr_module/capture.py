@@ -0,0 +1,50 @@
+import threading
+
+
+class CaptureSession:
+    """
+    Keeps one mss screen grabber alive instead of creating (and enumerating
+    monitors / creating DCs) on every capture.
+
+    mss handles hold per-thread device contexts on Windows, so one grabber is
+    kept per calling thread; in practice that is a single grabber for the
+    capture thread for the whole lifetime of the service.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._grabbers = []
+        self._lock = threading.Lock()
+
+    def _grabber(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            # Imported here so headless use of OCREngine (extract()) never touches the display stack
+            import mss
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._grabbers.append(sct)
+        return sct
+
+    def grab(self, bbox):
+        """
+        Grab (x1, y1, x2, y2) and return the raw mss ScreenShot (BGRA).
+        """
+        monitor = {
+            "left": bbox[0],
+            "top": bbox[1],
+            "width": bbox[2] - bbox[0],
+            "height": bbox[3] - bbox[1]
+        }
+        return self._grabber().grab(monitor)
+
+    def close(self):
+        with self._lock:
+            for sct in self._grabbers:
+                try:
+                    sct.close()
+                except Exception:
+                    pass
+            self._grabbers = []
+        self._local = threading.local()
@@ -1,71 +1,281 @@
+import hashlib
+import io
+import json
 import os
-import pytesseract
-import mss
-from PIL import Image, ImageEnhance, ImageFilter
-from ctypes import windll
+import time
+
+import numpy as np
+from PIL import Image
+
+from src import metrics
+from src.ocr_module.backends import create_backend, words_to_text
+from src.ocr_module.capture import CaptureSession
+from src.ocr_module.preprocess import Preprocessor
+from src.ocr_module.quality import DEFAULT_CONFIG as QUALITY_DEFAULTS
+from src.ocr_module.quality import OCRResult, empty_result, mean_confidence
+from src.ocr_module.regions import TextRegionDetector
+from src.ocr_module.tiling import TiledOCR
+
+
+def load_image(image):
+    """
+    Accept a PIL image, a NumPy array (grayscale, RGB or RGBA), encoded
+    image bytes or a file path, and return something Preprocessor.grayscale
+    takes, plus its channel order.
+    """
+    if isinstance(image, Image.Image):
+        return image, None
+    if isinstance(image, np.ndarray):
+        # Arrays from callers are RGB(A); only mss frames are BGRA
+        return image, "RGB"
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(image))
+    elif isinstance(image, (str, os.PathLike)):
+        image = Image.open(image)
+    else:
+        raise TypeError(f"Unsupported image type: {type(image).__name__}")
+    image.load()
+    return image, None
 
 
 class OCREngine:
-    def __init__(self, tesseract_cmd):
+    def __init__(self, tesseract_cmd, cache=None, backend="pytesseract", tessdata_path=None,
+                 preprocess=None, session=None, tiling=None, regions=None, quality=None):
         """
         Initialize OCR Engine with path to Tesseract executable.
+
+        Args:
+            tesseract_cmd (str): path to the Tesseract executable
+            cache (OCRCache): optional cache of results for repeat captures
+            backend (str): "pytesseract" (process per call) or "tesserocr"
+                (persistent libtesseract handle, falls back to pytesseract)
+            tessdata_path (str): tessdata directory for the tesserocr backend
+            preprocess (dict): Preprocessor settings ("preprocess" in config.json)
+            session (CaptureSession): long-lived screen grabber to reuse
+            tiling (dict): TiledOCR settings ("tiling" in config.json) for
+                splitting large selections across a process pool
+            regions (dict): TextRegionDetector settings ("regions" in
+                config.json) for OCR'ing only the text blocks of a selection
+            quality (dict): confidence / re-OCR settings ("ocr_quality" in
+                config.json, see quality.DEFAULT_CONFIG)
         """
-        if not os.path.exists(tesseract_cmd):
-            raise FileNotFoundError(f"Tesseract executable not found at: {tesseract_cmd}")
-        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.backend = create_backend(backend, tesseract_cmd, tessdata_path)
+        self.cache = cache
+        self.preprocessor = Preprocessor(preprocess)
+        self.session = session or CaptureSession()
+        self.tiler = TiledOCR(self.backend.name, tesseract_cmd, tessdata_path, tiling)
+        self.regions = TextRegionDetector(regions)
+        self.quality = dict(QUALITY_DEFAULTS, **(quality or {}))
+        self._variant_preprocessors = {}
+        # Cached text is only valid for the settings that produced it
+        settings = {
+            "backend": self.backend.name,
+            "preprocess": self.preprocessor.config,
+            "regions": self.regions.config,
+            "quality": self.quality,
+        }
+        self._settings_digest = hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:12]
 
         # Ensure DPI awareness (important for Windows high-DPI screens)
         try:
+            from ctypes import windll
             windll.shcore.SetProcessDpiAwareness(2)
         except Exception:
             pass  # Safe to ignore if not on Windows
 
     def _preprocess(self, img):
         """
-        Preprocess image using PIL only.
-        Steps:
-        - Convert to grayscale
-        - Resize (2x for better OCR on small text)
-        - Slight contrast enhancement
-        - Optional sharpen
+        Preprocess a PIL image, NumPy array or mss frame for OCR.
+        See Preprocessor for the steps; per-step timings end up in
+        self.preprocessor.last_timings.
         """
-        img = img.convert("L")  # grayscale
-        img = img.resize((img.size[0] * 2, img.size[1] * 2), Image.LANCZOS)
-        img = ImageEnhance.Contrast(img).enhance(1.5)
-        img = img.filter(ImageFilter.SHARPEN)
-        return img
+        return self.preprocessor.run(img)
 
-    def capture_and_extract(self, bbox, psm=6):
+    def _ocr(self, img, psm):
         """
-        Capture a screen region and extract text via OCR.
+        Large images (long logs, full-screen windows) are OCR'd as parallel
+        bands; everything else is a single backend call.
+        """
+        if self.tiler.applies_to(img):
+            try:
+                return self.tiler.image_to_string(img, psm=psm)
+            except Exception as e:
+                print(f"Tiled OCR failed ({e}), using a single OCR call.")
+        return self.backend.image_to_string(img, psm=psm)
+
+    def ocr_gray(self, gray, psm=6, preprocessor=None):
+        """
+        Finish preprocessing an already grayscale array (see
+        Preprocessor.grayscale) and OCR it. Callers on another thread than
+        the capture pipeline (watch mode) pass their own `preprocessor`, so
+        they don't share its per-call timings.
+        """
+        with metrics.timer("preprocess", step="finish"):
+            processed = (preprocessor or self.preprocessor).finish(gray)
+
+        # Debug: save preprocessed image if needed
+        # processed.save("debug_preprocessed.png")
+
+        with metrics.timer("ocr", backend=self.backend.name):
+            return self._ocr(processed, psm).strip()
+
+    def _preprocessor_for(self, variant):
+        overrides = (variant or {}).get("preprocess")
+        if not overrides:
+            return self.preprocessor
+        key = json.dumps(overrides, sort_keys=True)
+        if key not in self._variant_preprocessors:
+            self._variant_preprocessors[key] = Preprocessor(dict(self.preprocessor.config, **overrides))
+        return self._variant_preprocessors[key]
+
+    def _read_words(self, gray, boxes, psm, preprocessor):
+        """
+        One OCR pass over the given (y0, x0, y1, x1) crops of a grayscale
+        frame. Returns (words, text, confidence) with word boxes mapped back
+        to frame pixels; confidence is None for tiled (string-only) reads.
+        """
+        words, texts, known = [], [], True
+        for index, (y0, x0, y1, x1) in enumerate(boxes):
+            with metrics.timer("preprocess", step="finish"):
+                processed = preprocessor.finish(gray[y0:y1, x0:x1])
+            with metrics.timer("ocr", backend=self.backend.name):
+                if self.tiler.applies_to(processed):
+                    texts.append(self._ocr(processed, psm).strip())
+                    known = False
+                    continue
+                found = self.backend.image_to_data(processed, psm=psm)
+            # Undo the upscaling, then shift into frame coordinates
+            scale = (x1 - x0) / processed.size[0]
+            crop_words = [
+                word._replace(left=x0 + round(word.left * scale), top=y0 + round(word.top * scale),
+                              width=round(word.width * scale), height=round(word.height * scale),
+                              line=(index, word.line))
+                for word in found
+            ]
+            words.extend(crop_words)
+            texts.append(words_to_text(crop_words))
+        text = "\n".join(text for text in texts if text)
+        confidence = (mean_confidence(words) or 0.0) if known else None
+        return words, text, confidence
+
+    def _read_gray(self, gray, psm=6):
+        """
+        OCR a grayscale frame: text blocks only (see TextRegionDetector),
+        re-OCR'd with the configured variants while the mean confidence is
+        low and the latency budget allows, keeping the best pass.
+        """
+        config = f"--psm {psm}|{self._settings_digest}"
+        self.regions.last_stats = {}
+
+        # Same dialog captured again? Skip preprocessing and Tesseract
+        if self.cache is not None:
+            with metrics.timer("ocr_cache_lookup"):
+                cached = self.cache.get(Image.fromarray(gray), config)
+            if cached is not None:
+                return OCRResult(cached, [], None, None, [], False)
+
+        boxes = None
+        if self.regions.enabled:
+            boxes = self.regions.find(gray)
+            stats = self.regions.last_stats
+            metrics.observe("detect_regions", stats["detect_ms"], fields={
+                "blocks": stats["blocks"], "skipped_pixels": stats["skipped_pixels"],
+            })
+        boxes = boxes or [(0, 0, gray.shape[0], gray.shape[1])]
+
+        cfg = self.quality
+        variants = [None] + (cfg["variants"] if cfg["enabled"] else [])
+        start = time.perf_counter()
+        attempts = []
+        best = None
+        for variant in variants:
+            if best is not None:
+                if best.confidence is None or best.confidence >= cfg["min_confidence"]:
+                    break
+                # Assume the next pass costs about as much as the first one
+                if (time.perf_counter() - start) * 1000 + attempts[0]["ms"] > cfg["budget_ms"]:
+                    break
+            t0 = time.perf_counter()
+            words, text, confidence = self._read_words(
+                gray, boxes, (variant or {}).get("psm", psm), self._preprocessor_for(variant)
+            )
+            ms = (time.perf_counter() - t0) * 1000
+            attempts.append({"variant": variant, "confidence": confidence, "ms": ms})
+            if variant is not None:
+                metrics.observe("ocr_retry", ms, fields={"variant": variant, "confidence": confidence})
+            if best is None or (confidence or 0.0) > (best.confidence or 0.0):
+                best = OCRResult(text, words, confidence, variant, attempts, False)
+
+        unreadable = cfg["enabled"] and best.confidence is not None and best.confidence < cfg["unreadable_below"]
+        result = best._replace(unreadable=unreadable)
+
+        if self.cache is not None and result.text and not unreadable:
+            self.cache.put(Image.fromarray(gray), config, result.text)
+        return result
+
+    def read(self, image, psm=6):
+        """
+        OCR an image that is already in memory or on disk (no screen needed)
+        and return an OCRResult (text, words with confidences and boxes).
+
+        Args:
+            image: PIL image, NumPy array (grayscale / RGB / RGBA), encoded
+                image bytes or a file path
+            psm (int): Tesseract page segmentation mode
+        Raises:
+            TypeError / OSError for unsupported or unreadable input
+        """
+        frame, channel_order = load_image(image)
+        with metrics.timer("preprocess", step="grayscale"):
+            gray = self.preprocessor.grayscale(frame, channel_order)
+        return self._read_gray(gray, psm)
+
+    def extract(self, image, psm=6):
+        """
+        Text-only version of read().
+        """
+        return self.read(image, psm).text
+
+    def capture(self, bbox, psm=6):
+        """
+        Capture a screen region and OCR it; returns an OCRResult (empty
+        and not flagged unreadable when the capture itself failed).
 
         Args:
             bbox (tuple): (x1, y1, x2, y2) region to capture
             psm (int): Tesseract page segmentation mode
         """
         try:
-            # Capture region with mss
-            with mss.mss() as sct:
-                monitor = {
-                    "left": bbox[0],
-                    "top": bbox[1],
-                    "width": bbox[2] - bbox[0],
-                    "height": bbox[3] - bbox[1]
-                }
-                screenshot = sct.grab(monitor)
-                img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-
-            # Preprocess
-            img = self._preprocess(img)
-
-            # Debug: save preprocessed image if needed
-            # img.save("debug_preprocessed.png")
-
-            # OCR
-            config = f"--psm {psm}"
-            text = pytesseract.image_to_string(img, config=config)
-            return text.strip()
+            # Capture region with the long-lived mss grabber
+            with metrics.timer("grab"):
+                screenshot = self.session.grab(bbox)
+
+            # Grayscale straight from the BGRA buffer (no Image.frombytes copy)
+            with metrics.timer("preprocess", step="grayscale"):
+                gray = self.preprocessor.grayscale(screenshot)
+
+            return self._read_gray(gray, psm)
 
         except Exception as e:
             print(f"Error during OCR: {e}")
-            return ""
\ No newline at end of file
+            return empty_result()
+
+    def capture_and_extract(self, bbox, psm=6):
+        """
+        Capture a screen region and extract text via OCR.
+
+        Args:
+            bbox (tuple): (x1, y1, x2, y2) region to capture
+            psm (int): Tesseract page segmentation mode
+        """
+        return self.capture(bbox, psm).text
+
+    def close(self):
+        """
+        Release the OCR backend and the screen grabber.
+        """
+        self.backend.close()
+        self.tiler.close()
+        if self.cache is not None:
+            self.cache.flush()
+        self.session.close()
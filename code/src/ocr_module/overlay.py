@@ -1,3 +1,4 @@
+import time
 import tkinter as tk
 from tkinter import Canvas
 
@@ -8,13 +9,18 @@ class RegionSelection:
         self.start_y = None
         self.current_rect = None
         self.glow_rects = []
+        self.root = None
+        self.canvas = None
+        self.last_show_ms = None
 
-    def get_region(self):
+    def _build(self):
         """
-        Opens a full-screen overlay to let the user select a region.
-        Returns a tuple (x1, y1, x2, y2) or None if cancelled.
+        Create the overlay window once. Between captures it is only hidden
+        (withdraw) and shown again (deiconify), so Tk start-up and the glow
+        border drawing are not paid per capture.
         """
         self.root = tk.Tk()
+        self.root.withdraw()
         self.root.attributes("-fullscreen", True)
         self.root.attributes("-alpha", 0.3)  # Semi-transparent
         self.root.attributes("-topmost", True)
@@ -29,7 +35,10 @@ class RegionSelection:
         self.canvas = Canvas(self.root, cursor="cross", bg="black", highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
         # Make the canvas slightly transparent to see through
-        self.root.attributes("-transparentcolor", "white") 
+        try:
+            self.root.attributes("-transparentcolor", "white")
+        except tk.TclError:
+            pass  # Windows-only attribute
 
         # However, standard tkinter doesn't support easy "cut out" selection transparency effectively without complex hacks on some systems.
         # A simpler approach for the overlay:
@@ -49,22 +58,58 @@ class RegionSelection:
         
         for i in range(4):
             offset = i * 2
-            self.canvas.create_rectangle(
+            self.glow_rects.append(self.canvas.create_rectangle(
                 offset, offset, w-offset, h-offset,
                 outline=colors[i], width=widths[i], state='disabled'
-            )
+            ))
 
         self.canvas.bind("<Button-1>", self.on_button_press)
         self.canvas.bind("<B1-Motion>", self.on_move_press)
         self.canvas.bind("<ButtonRelease-1>", self.on_button_release)
         self.canvas.bind("<Escape>", self.cancel)
 
+    def prewarm(self):
+        """
+        Build the hidden overlay ahead of the first hotkey press.
+        Must be called from the thread that will call get_region().
+        """
+        if self.root is None:
+            self._build()
+
+    def get_region(self):
+        """
+        Opens a full-screen overlay to let the user select a region.
+        Returns a tuple (x1, y1, x2, y2) or None if cancelled.
+        """
+        start = time.perf_counter()
+        self.prewarm()
+
+        self.selection = None
+        if self.current_rect:
+            self.canvas.delete(self.current_rect)
+            self.current_rect = None
+
+        self.root.deiconify()
+        self.root.attributes("-topmost", True)
         # Force focus
         self.root.focus_force()
+        self.canvas.focus_set()
+        self.root.update_idletasks()
+        self.last_show_ms = (time.perf_counter() - start) * 1000
+
         self.root.mainloop()
 
         return self.selection
 
+    def _hide(self):
+        self.root.withdraw()
+        self.root.quit()
+
+    def close(self):
+        if self.root is not None:
+            self.root.destroy()
+            self.root = None
+
     def on_button_press(self, event):
         self.start_x = event.x
         self.start_y = event.y
@@ -93,15 +138,16 @@ class RegionSelection:
         if x2 - x1 > 0 and y2 - y1 > 0:
             self.selection = (x1, y1, x2, y2)
         
-        self.root.quit()
-        self.root.destroy()
+        self._hide()
 
     def cancel(self, event):
         self.selection = None
-        self.root.quit()
-        self.root.destroy()
+        self._hide()
 
 if __name__ == "__main__":
     # Test
     r = RegionSelection()
     print(r.get_region())
+    print(f"Second selection (overlay reused, shown in {r.last_show_ms:.1f} ms):")
+    print(r.get_region())
+    r.close()
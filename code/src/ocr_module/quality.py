@@ -0,0 +1,37 @@
+from collections import namedtuple
+
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "min_confidence": 70,      # mean word confidence below this triggers a re-OCR
+    "unreadable_below": 35,    # best result still below this: don't bother the LLM
+    "budget_ms": 1500,         # total time for the first pass plus retries
+    # Tried in order until one reaches min_confidence or the budget runs out;
+    # "preprocess" entries override the normal preprocessing settings
+    "variants": [
+        {"psm": 11},
+        {"preprocess": {"threshold": True}},
+        {"psm": 4, "preprocess": {"upscale": "always", "scale": 3}},
+    ],
+}
+
+# Outcome of reading one frame. `words` are backends.Word with boxes in
+# frame pixels (empty on a cache hit or a tiled read), `confidence` is the
+# character-weighted mean word confidence (None when unknown), `variant` the
+# settings that produced the kept result (None = first pass) and `attempts`
+# a list of {"variant", "confidence", "ms"} for every pass that ran.
+OCRResult = namedtuple("OCRResult", ["text", "words", "confidence", "variant", "attempts", "unreadable"])
+
+
+def mean_confidence(words):
+    """
+    Mean word confidence weighted by word length (None without words), so a
+    stray low-confidence "|" counts less than a misread long word.
+    """
+    total = sum(len(word.text) for word in words)
+    if not total:
+        return None
+    return sum(word.conf * len(word.text) for word in words) / total
+
+
+def empty_result(unreadable=False) -> OCRResult:
+    return OCRResult("", [], None, None, [], unreadable)
@@ -0,0 +1,169 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from src.ocr_module.backends import create_backend
+
+DEFAULT_CONFIG = {
+    "enabled": True,
+    "min_height": 800,     # px (after preprocessing); smaller images use one call
+    "band_height": 400,    # target band height (px)
+    "overlap": 24,         # rows added above/below each cut
+    "min_gap": 3,          # blank rows needed to count as a gap between lines
+    "workers": None,       # default: min(4, cpu count)
+}
+
+
+def _ink_rows(gray: np.ndarray) -> np.ndarray:
+    background = int(np.median(gray))
+    return (np.abs(gray.astype(np.int16) - background) > 64).any(axis=1)
+
+
+def find_cuts(gray: np.ndarray, band_height: int, min_gap: int = 3):
+    """
+    Pick row indices to cut at, preferring the middle of blank gaps in the
+    row-projection profile so text lines are not split. Returns the band
+    boundaries including 0 and the image height, and the set of "hard"
+    cuts that had no gap to land in (those may split a text line).
+    """
+    h = gray.shape[0]
+    ink_rows = _ink_rows(gray)
+
+    # Centres of runs of at least min_gap blank rows
+    padded = np.concatenate(([True], ink_rows, [True]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    gaps = [int(s + e) // 2 for s, e in zip(starts, ends) if e - s >= min_gap]
+
+    cuts = [0]
+    hard = set()
+    while h - cuts[-1] > band_height:
+        lo = cuts[-1] + band_height // 2
+        hi = cuts[-1] + band_height
+        # Last gap inside the window, otherwise a hard cut (overlap covers it)
+        inside = [g for g in gaps if lo <= g <= hi]
+        if inside:
+            cuts.append(inside[-1])
+        else:
+            cuts.append(hi)
+            hard.add(hi)
+    cuts.append(h)
+    return cuts, hard
+
+
+def lines_in_window(gray: np.ndarray, top: int, bottom: int) -> int:
+    """
+    Number of text lines (runs of ink rows) that touch rows [top, bottom).
+    """
+    rows = _ink_rows(gray[max(0, top):bottom])
+    padded = np.concatenate(([False], rows, [False]))
+    return int(np.count_nonzero(padded[1:] & ~padded[:-1]))
+
+
+def stitch(texts: list, max_skip: list = None) -> str:
+    """
+    Join band texts in order. Lines repeated because two bands overlap are
+    dropped, but only at the start of a band and at most `max_skip[i]` lines
+    for the boundary before band i+1 (the lines inside the overlap window;
+    0 where the bands do not overlap). Genuinely repeated log lines further
+    from a boundary are kept.
+    """
+    lines = []
+    for i, text in enumerate(texts):
+        band = [line for line in text.splitlines() if line.strip()]
+        limit = len(band) if max_skip is None or i == 0 else max_skip[i - 1]
+        keys = [" ".join(line.split()) for line in band]
+        tail = [" ".join(line.split()) for line in lines[-len(band):]] if band else []
+        skip = 0
+        for k in range(min(len(tail), len(keys), limit), 0, -1):
+            if tail[-k:] == keys[:k]:
+                skip = k
+                break
+        lines.extend(band[skip:])
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Worker process side
+# ----------------------------------------------------------------------
+_worker_backend = None
+
+
+def _init_worker(backend_name, tesseract_cmd, tessdata_path):
+    global _worker_backend
+    _worker_backend = create_backend(backend_name, tesseract_cmd, tessdata_path)
+
+
+def _ocr_band(band: np.ndarray, psm: int) -> str:
+    return _worker_backend.image_to_string(Image.fromarray(band), psm=psm)
+
+
+class TiledOCR:
+    """
+    OCR large preprocessed images as overlapping horizontal bands on a
+    process pool, then stitch the text back together in order.
+    """
+
+    def __init__(self, backend_name, tesseract_cmd, tessdata_path=None, config: dict = None):
+        self.config = dict(DEFAULT_CONFIG)
+        if config:
+            self.config.update(config)
+        self._init_args = (backend_name, tesseract_cmd, tessdata_path)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def applies_to(self, img) -> bool:
+        return self.config["enabled"] and img.size[1] >= self.config["min_height"]
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                workers = self.config["workers"] or min(4, os.cpu_count() or 1)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=self._init_args,
+                )
+            return self._pool
+
+    def split(self, gray: np.ndarray):
+        """
+        Cut into bands. Only hard cuts (no blank gap to land in) get
+        `overlap` rows on both sides; a cut in a gap needs none, and padding
+        it would pull partial glyph rows of the neighbouring line into the
+        band. Returns the bands and, per boundary, how many text lines the
+        two bands can have in common (for stitch()).
+        """
+        cuts, hard = find_cuts(gray, self.config["band_height"], self.config["min_gap"])
+        overlap = self.config["overlap"]
+        h = gray.shape[0]
+        bands = []
+        for top, bottom in zip(cuts[:-1], cuts[1:]):
+            top = max(0, top - overlap) if top in hard else top
+            bottom = min(h, bottom + overlap) if bottom in hard else bottom
+            bands.append(gray[top:bottom])
+        shared = [
+            lines_in_window(gray, cut - overlap, cut + overlap) if cut in hard else 0
+            for cut in cuts[1:-1]
+        ]
+        return bands, shared
+
+    def image_to_string(self, img, psm=6) -> str:
+        bands, shared = self.split(np.asarray(img.convert("L")))
+        pool = self._executor()
+        try:
+            texts = list(pool.map(_ocr_band, bands, [psm] * len(bands)))
+        except Exception:
+            # A broken pool stays broken; start a fresh one next time
+            self.close()
+            raise
+        return stitch(texts, shared)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,215 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from src.ai_module.prompt import ERROR_PATTERN
+from src.ocr_module.preprocess import Preprocessor, to_array
+
+DEFAULT_CONFIG = {
+    "interval": 1.0,         # seconds between polls
+    "errors_only": True,     # only report new lines that look like errors
+    "ink_threshold": 32,     # brightness spread that makes a row "text"
+    "padding": 4,            # rows added around every changed band
+    "merge_gap": 16,         # bands closer than this are OCR'd as one
+    "full_ratio": 0.6,       # above this share of changed rows, OCR the whole frame
+    "max_shift": 400,        # largest scroll (rows) detected between two frames
+    "seen_lines": 2000,      # how many reported lines are remembered
+}
+
+
+def row_checksums(arr: np.ndarray) -> np.ndarray:
+    """
+    CRC32 of every pixel row, straight over the frame buffer (no copy).
+    """
+    if not arr.flags.c_contiguous:
+        arr = np.ascontiguousarray(arr)
+    return np.fromiter((zlib.crc32(row) for row in arr), dtype=np.uint32, count=arr.shape[0])
+
+
+def ink_rows(arr: np.ndarray, threshold: int = 32, step: int = 4) -> np.ndarray:
+    """
+    Rows that contain text, judged on every `step`-th column of one channel.
+    """
+    sample = arr[:, ::step, 1] if arr.ndim == 3 else arr[:, ::step]
+    return (sample.max(axis=1).astype(np.int16) - sample.min(axis=1)) > threshold
+
+
+def detect_scroll(previous: np.ndarray, current: np.ndarray, ink: np.ndarray,
+                  max_shift: int, min_rows: int = 8) -> int:
+    """
+    Rows the content moved up by between two frames (0 = no scroll found).
+
+    Only text rows of the current frame are compared (blank rows match at
+    any shift). A shift is accepted when at least 90% of those rows in the
+    overlap line up, and more of them than without shifting. The overlap is
+    kept to at least half the frame.
+    """
+    h = min(len(previous), len(current))
+
+    def score(shift):
+        overlap = h - shift
+        text = ink[:overlap]
+        n = np.count_nonzero(text)
+        if n < min_rows:
+            return 0.0
+        return np.count_nonzero((current[:overlap] == previous[shift:h]) & text) / n
+
+    best, best_score = 0, max(0.9, score(0))
+    for shift in range(1, min(max_shift, h // 2) + 1):
+        s = score(shift)
+        if s > best_score:
+            best, best_score = shift, s
+            if s == 1.0:
+                break
+    return best
+
+
+def changed_bands(changed: np.ndarray, ink: np.ndarray, padding: int, merge_gap: int = 0) -> list:
+    """
+    Turn a per-row changed mask into (start, end) row bands, grown to whole
+    text lines (runs of ink rows) and padded. Bands less than `merge_gap`
+    rows apart are merged, so a block of new lines is one OCR call.
+    """
+    h = len(changed)
+    rows = np.flatnonzero(changed & ink)
+    if not len(rows):
+        return []
+    # Runs of ink rows = text lines
+    padded = np.concatenate(([False], ink, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    line_of = np.searchsorted(ends, rows, side="right")
+
+    bands = []
+    for i in np.unique(line_of):
+        start = max(0, int(starts[i]) - padding)
+        end = min(h, int(ends[i]) + padding)
+        if bands and start <= bands[-1][1] + merge_gap:
+            bands[-1] = (bands[-1][0], max(bands[-1][1], end))
+        else:
+            bands.append((start, end))
+    return bands
+
+
+class RegionWatcher:
+    """
+    Watch mode: polls a pinned screen region with the engine's persistent
+    grabber and only re-OCRs what changed. Runs next to the capture
+    pipeline, so it preprocesses with its own Preprocessor (same settings)
+    and only shares the engine's thread-safe backend.
+
+    Every frame is reduced to one CRC32 per pixel row. Rows whose checksum
+    differs from the previous frame (after compensating for scrolling, so a
+    console that prints one new line only costs that line) are grown to
+    whole text lines and OCR'd band by band. Lines that were not reported
+    before (and, with errors_only, look like errors) are passed to
+    `on_lines(lines)`.
+    """
+
+    def __init__(self, engine, bbox, on_lines, config=None, psm=6):
+        self.engine = engine
+        self.preprocessor = Preprocessor(engine.preprocessor.config)
+        self.bbox = bbox
+        self.on_lines = on_lines
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.psm = psm
+        self._stop = threading.Event()
+        self._thread = None
+        self._checksums = None
+        self._seen = OrderedDict()
+        self.frames = 0
+        self.unchanged_frames = 0
+        self.rows_ocrd = 0
+        self.rows_total = 0
+        self.last_poll_ms = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="region-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"[WATCH] Poll failed: {e}")
+            self._stop.wait(self.config["interval"])
+
+    def poll(self) -> list:
+        """
+        Grab one frame, OCR the changed bands and report new lines.
+        Returns the lines that were reported.
+        """
+        start = time.perf_counter()
+        arr, order = to_array(self.engine.session.grab(self.bbox))
+        checksums = row_checksums(arr)
+        ink = ink_rows(arr, self.config["ink_threshold"])
+        h = len(checksums)
+        self.frames += 1
+        self.rows_total += h
+
+        previous = self._checksums
+        self._checksums = checksums
+        if previous is None or len(previous) != h:
+            changed = np.ones(h, dtype=bool)
+        else:
+            changed = checksums != previous
+            if not changed.any():
+                self.unchanged_frames += 1
+                self.last_poll_ms = (time.perf_counter() - start) * 1000
+                return []
+            shift = detect_scroll(previous, checksums, ink, self.config["max_shift"])
+            if shift:
+                # Content moved up by `shift`: compare against the moved rows
+                changed = np.ones(h, dtype=bool)
+                changed[:h - shift] = checksums[:h - shift] != previous[shift:]
+
+        if np.count_nonzero(changed) > self.config["full_ratio"] * h:
+            bands = [(0, h)]
+        else:
+            bands = changed_bands(changed, ink, self.config["padding"], self.config["merge_gap"])
+
+        texts = []
+        for y0, y1 in bands:
+            gray = self.preprocessor.grayscale(arr[y0:y1], channel_order=order)
+            texts.append(self.engine.ocr_gray(gray, self.psm, preprocessor=self.preprocessor))
+            self.rows_ocrd += y1 - y0
+
+        reported = self._new_lines("\n".join(texts))
+        self.last_poll_ms = (time.perf_counter() - start) * 1000
+        if reported:
+            self.on_lines(reported)
+        return reported
+
+    def _new_lines(self, text: str) -> list:
+        new = []
+        for line in text.splitlines():
+            key = " ".join(line.split())
+            if not key or key in self._seen:
+                continue
+            self._seen[key] = True
+            if len(self._seen) > self.config["seen_lines"]:
+                self._seen.popitem(last=False)
+            if not self.config["errors_only"] or ERROR_PATTERN.search(key):
+                new.append(key)
+        return new
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "unchanged_frames": self.unchanged_frames,
+            "ocr_row_share": self.rows_ocrd / self.rows_total if self.rows_total else 0.0,
+            "last_poll_ms": self.last_poll_ms,
+        }
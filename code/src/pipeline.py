@@ -0,0 +1,175 @@
+import itertools
+import queue
+import threading
+import time
+
+from src import metrics
+
+
+class CaptureJob:
+    """
+    One capture travelling through the pipeline. Stages read and fill in its
+    fields; `cancel_event` is set when the job has been superseded.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, selection):
+        self.id = next(self._ids)
+        self.selection = selection
+        self.text = None
+        self.ocr_confidence = None
+        self.unreadable = False
+        self.solution = None
+        self.suggestion = None
+        self.created = time.perf_counter()
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+_STOP = object()
+
+
+class Stage:
+    """
+    Worker thread(s) fed by a bounded queue. `func(job)` returns True to hand
+    the job on to the next stage, False when the job is finished.
+
+    With `supersede=True` a newly queued job cancels every older job still
+    waiting in or being processed by this stage (used for the LLM stage, where
+    only the latest capture's answer is worth waiting for). Older jobs for
+    which `supersede_key(job)` equals the new job's key are left running: the
+    new job will share their request rather than replace it.
+
+    `workers` > 1 lets a stage work on several jobs at once, e.g. so a new
+    capture can join an identical in-flight LLM request (see
+    ai_module.coalesce) instead of queueing behind it.
+    """
+
+    def __init__(self, name, func, maxsize=4, supersede=False, workers=1, supersede_key=None):
+        self.name = name
+        self.func = func
+        self.supersede = supersede
+        self.supersede_key = supersede_key
+        self._keys = {}     # job -> supersede_key(job)
+        self.next_stage = None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._active = set()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"stage-{name}-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def _key(self, job):
+        if not (self.supersede and self.supersede_key):
+            return None
+        try:
+            return self.supersede_key(job)
+        except Exception as e:
+            print(f"[PIPELINE] Could not compute supersede key for job {job.id}: {e}")
+            return None
+
+    def put(self, job: CaptureJob):
+        key = self._key(job)
+        with self._lock:
+            if self.supersede:
+                for older in self._active:
+                    if older.id < job.id and not older.cancelled:
+                        if key is not None and self._keys.get(older) == key:
+                            continue    # same request: the new job joins it
+                        print(f"[PIPELINE] Job {older.id} superseded by job {job.id}.")
+                        older.cancel()
+            self._active.add(job)
+            self._keys[job] = key
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            print(f"[PIPELINE] {self.name} queue full, dropping job {job.id}.")
+            job.cancel()
+            self._done(job)
+
+    def _done(self, job):
+        with self._lock:
+            self._active.discard(job)
+            self._keys.pop(job, None)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            try:
+                if job.cancelled:
+                    continue
+                with metrics.timer(f"pipeline_{self.name}"):
+                    forward = self.func(job)
+                if forward and self.next_stage and not job.cancelled:
+                    self.next_stage.put(job)
+                else:
+                    # End of the line for this job: capture -> answer
+                    metrics.observe("capture_total", (time.perf_counter() - job.created) * 1000,
+                                    fields={"job": job.id, "last_stage": self.name})
+            except Exception as e:
+                print(f"[PIPELINE] Error in {self.name} stage (job {job.id}): {e}")
+            finally:
+                self._done(job)
+
+    def stop(self):
+        # Block until there is room so every worker is guaranteed to see one
+        for _ in self._threads:
+            self._queue.put(_STOP)
+
+
+class CapturePipeline:
+    """
+    capture -> OCR -> match -> AI -> persist, each stage on its own thread.
+    submit() returns immediately, so the hotkey loop never waits on OCR or
+    the LLM, and a new capture can start while an answer is still streaming.
+    """
+
+    def __init__(self, stages, maxsize=4):
+        """
+        Args:
+            stages (list): (name, func) or (name, func, {"supersede": bool, "workers": int,
+                "supersede_key": callable}) tuples in pipeline order
+            maxsize (int): bound of every stage queue
+        """
+        self.stages = []
+        for spec in stages:
+            name, func = spec[0], spec[1]
+            options = spec[2] if len(spec) > 2 else {}
+            self.stages.append(Stage(name, func, maxsize=maxsize, **options))
+        self._by_name = {stage.name: stage for stage in self.stages}
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+        for stage in self.stages:
+            stage.start()
+
+    def submit(self, selection) -> CaptureJob:
+        job = CaptureJob(selection)
+        self.stages[0].put(job)
+        return job
+
+    def submit_text(self, text, stage="match") -> CaptureJob:
+        """
+        Queue already-extracted text (e.g. from watch mode), skipping the
+        stages before `stage`.
+        """
+        job = CaptureJob(None)
+        job.text = text
+        self._by_name[stage].put(job)
+        return job
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
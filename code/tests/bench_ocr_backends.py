@@ -0,0 +1,78 @@
+"""
+Compare per-capture OCR latency of the pytesseract and tesserocr backends.
+
+Usage (from the code/ directory):
+    python -m tests.bench_ocr_backends [image_path] [--runs N] [--tesseract-cmd PATH]
+
+Without an image a synthetic error dialog is rendered.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from src.ocr_module.backends import BACKENDS, create_backend
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src', 'config.json')
+
+
+def sample_image():
+    img = Image.new("RGB", (640, 120), "white")
+    draw = ImageDraw.Draw(img)
+    draw.text((10, 20), "The program can't start because MSVCP140.dll is missing", fill="black")
+    draw.text((10, 60), "from your computer. Try reinstalling the program.", fill="black")
+    return img
+
+
+def bench(backend, img, runs):
+    processed = img.convert("L")
+    backend.image_to_string(processed)  # first call pays one-off setup
+    timings = []
+    text = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        text = backend.image_to_string(processed)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "text": " ".join(text.split())[:60],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("image", nargs="?")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--tesseract-cmd", help="override tesseract_cmd from config.json")
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH, "r") as f:
+        config = json.load(f)
+    img = Image.open(args.image) if args.image else sample_image()
+
+    for name in BACKENDS:
+        try:
+            tesseract_cmd = args.tesseract_cmd or config.get("tesseract_cmd", "")
+            backend = create_backend(name, tesseract_cmd, config.get("tessdata_path"))
+        except FileNotFoundError as e:
+            print(f"{name:12s} skipped ({e})")
+            continue
+        if backend.name != name:
+            print(f"{name:12s} skipped (not available)")
+            continue
+        try:
+            result = bench(backend, img, args.runs)
+        finally:
+            backend.close()
+        print(f"{name:12s} mean {result['mean_ms']:7.1f} ms  p50 {result['p50_ms']:7.1f} ms  "
+              f"p95 {result['p95_ms']:7.1f} ms  | {result['text']}")
+
+
+if __name__ == "__main__":
+    main()
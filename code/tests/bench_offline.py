@@ -0,0 +1,264 @@
+"""
+Offline end-to-end benchmark over the screenshot corpus in tests/fixtures.
+No screen, keyboard or network needed: frames come from the fixture PNGs,
+the DB is a temporary copy of src/errors_db.json and the AI fallback talks
+to an in-process fake Ollama.
+
+Usage (from the code/ directory):
+    python -m tests.bench_offline [--runs N] [--baseline PATH] [--update-baseline]
+                                  [--max-cer-increase 0.02] [--max-latency-increase 0.25]
+                                  [--latency-slack-ms 1.0]
+
+Per capture it runs OCREngine.capture_and_extract (preprocessing + OCR),
+LookupService.lookup (normalization + matching) and, on a DB miss, the
+prompt builder + streaming AI client. It reports throughput, p50/p95/max
+latency per stage, OCR character error rate (CER) and match accuracy, and
+exits non-zero when the results regress past the thresholds compared with
+the saved baseline (tests/fixtures/bench_baseline.json), or when there is
+no baseline to compare with.
+
+If no Tesseract is installed the OCR stage is skipped and the ground truth
+text is fed to the rest of the pipeline (reported as "ocr": "skipped").
+The committed baseline is such a run (default --runs); latencies are only
+compared when the baseline used the same OCR backend and number of runs.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from src.ai_module.client import MistralClient
+from src.ai_module.database import LookupService
+from src.ai_module.prompt import PromptBuilder
+from src.ai_module.store import SolutionStore
+from tests.fake_ollama import base_url, fake_ollama
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(CODE_DIR, 'src', 'config.json')
+DB_PATH = os.path.join(CODE_DIR, 'src', 'errors_db.json')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+CORPUS_DIR = os.path.join(FIXTURES_DIR, 'corpus')
+BASELINE_PATH = os.path.join(FIXTURES_DIR, 'bench_baseline.json')
+
+
+class FixtureSession:
+    """
+    Stands in for CaptureSession: grab() returns the current fixture image.
+    """
+
+    def __init__(self):
+        self.image = None
+
+    def grab(self, bbox):
+        return self.image
+
+    def close(self):
+        pass
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def cer(predicted: str, truth: str) -> float:
+    """
+    Character error rate with whitespace runs collapsed on both sides.
+    """
+    predicted = " ".join(predicted.split())
+    truth = " ".join(truth.split())
+    if not truth:
+        return 0.0 if not predicted else 1.0
+    return levenshtein(predicted, truth) / len(truth)
+
+
+def percentiles(samples) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def load_config():
+    with open(CONFIG_PATH, 'r') as f:
+        return json.load(f)
+
+
+def make_engine(config, session):
+    """
+    OCREngine on the fixture session, or None when no Tesseract is available.
+    """
+    from src.ocr_module.engine import OCREngine
+    try:
+        return OCREngine(
+            config.get("tesseract_cmd"),
+            cache=None,     # measure real OCR every time
+            backend=config.get("ocr_backend", "pytesseract"),
+            tessdata_path=config.get("tessdata_path"),
+            preprocess=config.get("preprocess"),
+            session=session,
+            tiling=config.get("tiling"),
+            regions=config.get("regions"),
+            quality=config.get("ocr_quality"),
+        )
+    except Exception as e:
+        print(f"OCR unavailable ({e}); feeding ground truth to the rest of the pipeline.")
+        return None
+
+
+def run(runs: int) -> dict:
+    config = load_config()
+    with open(os.path.join(CORPUS_DIR, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    images = {item["image"]: Image.open(os.path.join(CORPUS_DIR, item["image"])).copy() for item in manifest}
+
+    session = FixtureSession()
+    engine = make_engine(config, session)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_offline_")
+    server = fake_ollama(first_token_delay=0.05, tokens=["ERROR SUMMARY:", " ...", " done"], token_delay=0.005)
+    try:
+        # Fresh copy of the curated DB; AI answers are not persisted so every run sees the same DB
+        shutil.copy(DB_PATH, os.path.join(tmp_dir, "errors_db.json"))
+        service = LookupService(
+            store=SolutionStore(path=os.path.join(tmp_dir, "errors_db.jsonl"),
+                                legacy_path=os.path.join(tmp_dir, "errors_db.json")),
+            cache_size=0,   # measure matching, not the result cache
+        )
+        prompt_builder = PromptBuilder.from_config(config.get("prompt", {}))
+        ai_client = MistralClient(base_url=base_url(server), retries=0)
+
+        timings = {"ocr": [], "match": [], "ai": [], "total": []}
+        cers = []
+        correct = 0
+        captures = 0
+        start = time.perf_counter()
+        for _ in range(runs):
+            for item in manifest:
+                t0 = time.perf_counter()
+                if engine is not None:
+                    session.image = images[item["image"]]
+                    text = engine.capture_and_extract((0, 0, 0, 0))
+                    timings["ocr"].append((time.perf_counter() - t0) * 1000)
+                    cers.append(cer(text, item["text"]))
+                else:
+                    text = item["text"]
+
+                t1 = time.perf_counter()
+                match = service.lookup(text)
+                timings["match"].append((time.perf_counter() - t1) * 1000)
+
+                expected = service.normalize(item["expect_key"]) if item["expect_key"] else None
+                correct += (match.key if match else None) == expected
+
+                if match is None:
+                    t2 = time.perf_counter()
+                    system, prompt = prompt_builder.build(text)
+                    response = ai_client.generate(prompt, system=system)
+                    if "error" in response:
+                        raise RuntimeError(f"fake Ollama call failed: {response['error']}")
+                    timings["ai"].append((time.perf_counter() - t2) * 1000)
+
+                timings["total"].append((time.perf_counter() - t0) * 1000)
+                captures += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        if engine is not None:
+            engine.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        "runs": runs,
+        "captures": captures,
+        "throughput_per_sec": round(captures / elapsed, 2),
+        "ocr": "skipped" if engine is None else getattr(engine.backend, "name", "unknown"),
+        "cer_mean": round(statistics.mean(cers), 4) if cers else None,
+        "match_accuracy": round(correct / captures, 4),
+        "latency": {stage: percentiles(samples) for stage, samples in timings.items()},
+    }
+
+
+def compare(result: dict, baseline: dict, max_cer_increase: float, max_latency_increase: float,
+            latency_slack_ms: float = 1.0) -> list:
+    """
+    Return a list of regression messages (empty = pass). A p95 latency
+    regresses when it exceeds the baseline by `max_latency_increase` and by
+    more than `latency_slack_ms`, so sub-millisecond stages don't flap.
+    """
+    failures = []
+    if result["cer_mean"] is not None and baseline.get("cer_mean") is not None:
+        if result["cer_mean"] > baseline["cer_mean"] + max_cer_increase:
+            failures.append(f"CER {result['cer_mean']:.4f} > baseline {baseline['cer_mean']:.4f} + {max_cer_increase}")
+    if result["match_accuracy"] < baseline.get("match_accuracy", 0):
+        failures.append(f"match accuracy {result['match_accuracy']:.2%} < baseline {baseline['match_accuracy']:.2%}")
+    # p95 over one pass is mostly the cold first lookups; only compare like with like
+    if baseline.get("ocr") != result["ocr"] or baseline.get("runs") != result["runs"]:
+        return failures
+    for stage in ("ocr", "match", "total"):
+        now = result["latency"].get(stage, {}).get("p95_ms")
+        before = baseline.get("latency", {}).get(stage, {}).get("p95_ms")
+        if now is not None and before:
+            if now > before * (1 + max_latency_increase) and now - before > latency_slack_ms:
+                failures.append(f"{stage} p95 {now:.1f} ms > baseline {before:.1f} ms + {max_latency_increase:.0%}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="passes over the corpus")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the new baseline")
+    parser.add_argument("--max-cer-increase", type=float, default=0.02, help="absolute CER increase allowed")
+    parser.add_argument("--max-latency-increase", type=float, default=0.25, help="relative p95 increase allowed")
+    parser.add_argument("--latency-slack-ms", type=float, default=1.0,
+                        help="absolute p95 increase always allowed")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    print(json.dumps(result, indent=2))
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline}; run with --update-baseline to record one.")
+        sys.exit(1)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("ocr") != result["ocr"]:
+        print(f"Note: baseline OCR backend was {baseline.get('ocr')}, this run used {result['ocr']}; "
+              f"latencies not compared.")
+    elif baseline.get("runs") != result["runs"]:
+        print(f"Note: baseline used --runs {baseline.get('runs')}, this run {result['runs']}; latencies not compared.")
+    failures = compare(result, baseline, args.max_cer_increase, args.max_latency_increase, args.latency_slack_ms)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ No regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Startup benchmark: how long until the hotkey is live and until the services
+(OCR, DB, LLM client, pipeline) are ready, and which imports cost the most.
+
+Usage (from the code/ directory):
+    python -m tests.bench_startup [--runs N] [--top N] [--max-ready-ms MS]
+
+Each run starts a fresh interpreter with `-X importtime`, so nothing is
+cached between runs except the OS file cache. The model warm-up thread is
+not started (it only waits on Ollama). The error DB, AI tier and embedding
+index are temporary copies, so the warm-up (which may migrate or compact
+them) never touches the files in src/. Exits non-zero when the median
+time-to-ready is above --max-ready-ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line with the timings
+DRIVER = r"""
+import json, os, shutil, tempfile, time
+t0 = time.perf_counter()
+import src.main as app
+t_import = time.perf_counter()
+
+# Work on copies of the DB files (not timed)
+from src.ai_module import embeddings, store, tiers
+tmp_dir = tempfile.mkdtemp(prefix="bench_startup_")
+def copy(path):
+    target = os.path.join(tmp_dir, os.path.basename(path))
+    if os.path.exists(path):
+        shutil.copy(path, target)
+    return target
+store._default_store = store.SolutionStore(path=copy(store.LOG_FILE), legacy_path=copy(store.LEGACY_FILE))
+tiers.AI_LOG_FILE = copy(tiers.AI_LOG_FILE)
+embeddings.EmbeddingIndex.__init__.__defaults__ = (copy(embeddings.INDEX_FILE), copy(embeddings.KEYS_FILE))
+t_setup = time.perf_counter() - t_import
+missing = []
+for name in ("keyboard", "pystray"):
+    try:
+        __import__(name)
+    except ImportError:
+        missing.append(name)
+t_hotkey = time.perf_counter()
+app.warm_up_services(start_model=False)
+t_ready = time.perf_counter()
+shutil.rmtree(tmp_dir, ignore_errors=True)
+print("BENCH " + json.dumps({
+    "import_main_ms": (t_import - t0) * 1000,
+    "time_to_hotkey_ms": (t_hotkey - t0 - t_setup) * 1000,
+    "warm_up_ms": (t_ready - t_hotkey) * 1000,
+    "time_to_ready_ms": (t_ready - t0 - t_setup) * 1000,
+    "missing": missing,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Top-level package -> total import time in ms, from -X importtime output.
+    Self times are summed per package, so e.g. every numpy submodule counts
+    towards "numpy" no matter who imported it.
+    """
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|")
+            self_us = int(self_us)
+        except ValueError:
+            continue
+        top = name.strip().split(".")[0]
+        totals[top] = totals.get(top, 0) + self_us / 1000
+    return totals
+
+
+def run_once():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", DRIVER],
+        cwd=CODE_DIR, capture_output=True, text=True,
+    )
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            result = json.loads(line[len("BENCH "):])
+    if result is None:
+        raise RuntimeError(f"startup failed:\n{proc.stderr[-2000:]}")
+    return result, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--max-ready-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    results = []
+    imports = {}
+    for _ in range(args.runs):
+        result, totals = run_once()
+        results.append(result)
+        for name, ms in totals.items():
+            imports.setdefault(name, []).append(ms)
+
+    summary = {
+        key: statistics.median(r[key] for r in results)
+        for key in ("import_main_ms", "time_to_hotkey_ms", "warm_up_ms", "time_to_ready_ms")
+    }
+    print(f"Startup over {args.runs} runs (median):")
+    for key, value in summary.items():
+        print(f"  {key:<18} {value:8.1f} ms")
+    if results[0]["missing"]:
+        print(f"  (not installed, not timed: {', '.join(results[0]['missing'])})")
+
+    print("\nSlowest packages to import (median):")
+    ranked = sorted(imports.items(), key=lambda item: -statistics.median(item[1]))
+    for name, samples in ranked[:args.top]:
+        print(f"  {name:<24} {statistics.median(samples):8.1f} ms")
+
+    if args.max_ready_ms is not None and summary["time_to_ready_ms"] > args.max_ready_ms:
+        print(f"\n❌ time to ready {summary['time_to_ready_ms']:.0f} ms > {args.max_ready_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
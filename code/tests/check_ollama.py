@@ -1,25 +1,99 @@
+"""
+Ollama health and latency probe: is the server up, is the model installed
+and loaded, and how long does a request take from cold vs. warm.
+
+Usage (from the code/ directory):
+    python -m tests.check_ollama [--skip-cold] [--runs N]
+
+The cold measurement unloads the model first (keep_alive 0), so expect it
+to take as long as the first capture after a fresh start.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
 import requests
 
-def check_ollama():
+from src.ai_module.client import MistralClient
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src', 'config.json')
+
+
+def load_ollama_config():
+    if os.path.exists(CONFIG_PATH):
+        with open(CONFIG_PATH, 'r') as f:
+            return json.load(f).get("ollama", {})
+    return {}
+
+
+def check_server(base_url):
     print("Checking Ollama status...")
-    try:
-        # Check if running
-        r = requests.get("http://localhost:11434/")
-        print(f"Root endpoint status: {r.status_code}")
-        print(f"Root text: {r.text}")
-
-        # Check models
-        r = requests.get("http://localhost:11434/api/tags")
-        if r.status_code == 200:
-            models = r.json().get('models', [])
-            print("\nAvailable models:")
-            for m in models:
-                print(f" - {m['name']}")
-        else:
-            print(f"Failed to list models: {r.status_code} {r.text}")
+    r = requests.get(f"{base_url}/", timeout=5)
+    print(f"Root endpoint status: {r.status_code} ({r.text.strip()})")
 
+    r = requests.get(f"{base_url}/api/tags", timeout=5)
+    r.raise_for_status()
+    models = [m['name'] for m in r.json().get('models', [])]
+    print("Available models:")
+    for name in models:
+        print(f" - {name}")
+    return models
+
+
+def time_generate(client, prompt="Say OK."):
+    """
+    One short generation: (first token ms, total ms).
+    """
+    start = time.perf_counter()
+    result = client.generate(prompt, max_tokens=8)
+    total = (time.perf_counter() - start) * 1000
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    stats = result.get("stats") or {}
+    return stats.get("ttft_ms"), total
+
+
+def check_ollama(skip_cold=False, runs=3):
+    config = load_ollama_config()
+    client = MistralClient.from_config(config)
+    try:
+        models = check_server(client.base_url)
     except Exception as e:
-        print(f"Connection failed: {e}")
+        print(f"❌ Connection failed: {e}")
+        return
+
+    if client.model not in models and f"{client.model}:latest" not in models:
+        print(f"❌ Model '{client.model}' is not installed (ollama pull {client.model})")
+        return
+    print(f"Model '{client.model}' loaded: {client.is_loaded()}")
+
+    if not skip_cold:
+        print("\nUnloading model for a cold start...")
+        client.unload()
+        warm_up = client.warm_up()
+        print(f"Cold load:  {warm_up['seconds'] * 1000:.0f} ms (Ollama load_duration {warm_up['load_ms']:.0f} ms)")
+        # The first generation also evaluates the prompt from scratch
+        ttft, total = time_generate(client)
+        first_token = f"{ttft:.0f} ms" if ttft is not None else "n/a"
+        print(f"First request after load: first token {first_token}, total {total:.0f} ms")
+
+    warm_up = client.warm_up()
+    print(f"\nWarm keep-alive ping: {warm_up['seconds'] * 1000:.0f} ms")
+    ttfts, totals = [], []
+    for _ in range(runs):
+        ttft, total = time_generate(client)
+        ttfts.append(ttft or 0)
+        totals.append(total)
+    print(f"Warm requests ({runs}): first token median {statistics.median(ttfts):.0f} ms, "
+          f"total median {statistics.median(totals):.0f} ms")
+    client.close()
+
 
 if __name__ == "__main__":
-    check_ollama()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skip-cold", action="store_true", help="don't unload the model first")
+    parser.add_argument("--runs", type=int, default=3, help="warm requests to time")
+    args = parser.parse_args()
+    check_ollama(skip_cold=args.skip_cold, runs=args.runs)
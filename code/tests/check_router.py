@@ -0,0 +1,91 @@
+"""
+Exercise ModelRouter against local fake Ollama servers (no model needed).
+
+Usage (from the code/ directory):
+    python -m tests.check_router
+
+Exits non-zero when any check fails.
+
+Starts a "fast" and a "slow" fake /api/generate endpoint and checks that the
+router prefers the fast one, hedges when the first token is late, fails over
+on errors and opens the circuit on a backend that keeps timing out.
+"""
+import json
+import sys
+import time
+
+from src.ai_module.client import MistralClient
+from src.ai_module.router import ModelRouter
+from tests.fake_ollama import base_url, fake_ollama
+
+
+def client_for(server, read_timeout=5):
+    return MistralClient(base_url=base_url(server), read_timeout=read_timeout, retries=0)
+
+
+RESULTS = []
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    RESULTS.append(bool(condition))
+    return condition
+
+
+def main():
+    fast = fake_ollama(0.05)
+    slow = fake_ollama(1.0)
+    broken = fake_ollama(0, status=500)
+    try:
+        run_checks(fast, slow, broken)
+    finally:
+        for server in (fast, slow, broken):
+            server.shutdown()
+    failures = RESULTS.count(False)
+    if failures:
+        print(f"{failures} of {len(RESULTS)} router checks FAILED")
+        sys.exit(1)
+    print(f"All {len(RESULTS)} router checks passed")
+
+
+def run_checks(fast, slow, broken):
+
+    # 1. Selection: after one sample each the fast backend is preferred
+    router = ModelRouter([("slow", client_for(slow)), ("fast", client_for(fast))], hedge_after=None)
+    router.generate("warm up")          # measures "slow"
+    router.generate("warm up")          # "fast" has no samples yet -> tried next
+    result = router.generate("which one?")
+    check(f"fastest backend selected (got {result.get('backend')})", result.get("backend") == "fast")
+
+    # 2. Hedging: slow primary, the second backend wins after the deadline
+    router = ModelRouter([("slow", client_for(slow)), ("fast", client_for(fast))], hedge_after=0.2)
+    start = time.perf_counter()
+    result = router.generate("hedge me")
+    elapsed = time.perf_counter() - start
+    check(f"hedged request won by fast backend in {elapsed * 1000:.0f} ms",
+          result.get("backend") == "fast" and result.get("response") == "Hello world!" and elapsed < 0.9)
+    check("hedge counted", router.hedges == 1 and router.hedge_wins == 1)
+
+    # 3. Failover: an erroring primary falls through to the next backend
+    router = ModelRouter([("broken", client_for(broken)), ("fast", client_for(fast))], hedge_after=None)
+    result = router.generate("fail over")
+    check("failover to healthy backend", result.get("backend") == "fast" and router.failovers == 1)
+
+    # 4. Circuit breaker: a backend that keeps timing out is taken out of rotation
+    router = ModelRouter(
+        [("slow", client_for(slow, read_timeout=0.3)), ("fast", client_for(fast))],
+        hedge_after=None, failure_threshold=2, cooldown=60,
+    )
+    for _ in range(2):
+        router.health["fast"].record_latency(10_000)  # make "slow" look better on paper
+        router.generate("time out")
+    state = router.stats()["backends"]["slow"]["circuit"]
+    check(f"circuit open on timing-out backend (state: {state})", state == "open")
+    result = router.generate("after breaker")
+    check("open backend skipped", result.get("backend") == "fast")
+
+    print(json.dumps(router.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
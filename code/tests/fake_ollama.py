@@ -0,0 +1,76 @@
+"""
+Minimal in-process stand-in for the Ollama HTTP API, for the check / bench
+scripts: /api/generate and /api/chat stream chunked NDJSON like the real
+server, an empty generate (warm-up) returns a single JSON object.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TOKENS = ("Hello", " world", "!")
+
+
+def fake_ollama(first_token_delay=0.05, status=200, tokens=DEFAULT_TOKENS, token_delay=0.02):
+    """
+    Start a fake Ollama on a free localhost port that streams `tokens` after
+    `first_token_delay` seconds (or answers every POST with `status`).
+    Returns the server; its base URL is base_url(server), stop it with
+    server.shutdown().
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if status != 200:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if "prompt" not in request and "messages" not in request:
+                body = json.dumps({"model": request.get("model"), "done": True}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chat = "messages" in request
+
+            def write(data):
+                line = (json.dumps(data) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+
+            try:
+                time.sleep(first_token_delay)
+                for token in tokens:
+                    if chat:
+                        write({"message": {"role": "assistant", "content": token}, "done": False})
+                    else:
+                        write({"response": token, "done": False})
+                    time.sleep(token_delay)
+                prompt_tokens = len(request.get("prompt", "").split()) + len(request.get("system", "").split())
+                write({"response": "", "done": True, "eval_count": len(tokens),
+                       "prompt_eval_count": prompt_tokens})
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server) -> str:
+    host, port = server.server_address
+    return f"http://{host}:{port}"
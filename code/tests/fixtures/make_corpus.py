@@ -0,0 +1,169 @@
+"""
+(Re)generate the synthetic screenshot corpus used by tests/bench_offline.py.
+
+Usage (from the code/ directory):
+    python -m tests.fixtures.make_corpus
+
+Each fixture is a rendered error dialog / console window plus its ground
+truth text and the DB key it should match (null = goes to the AI fallback).
+Real screenshots can be added to corpus/ by hand: drop the PNG next to the
+others and add an entry to manifest.json.
+"""
+import json
+import os
+
+from PIL import Image, ImageDraw, ImageFont
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+FIXTURES = [
+    {
+        "name": "msvcp140_missing",
+        "style": "dialog",
+        "title": "System Error",
+        "lines": [
+            "The program can't start because MSVCP140.dll is missing",
+            "from your computer. Try reinstalling the program to fix",
+            "this problem.",
+        ],
+        "expect_key": "msvcp140.dll is missing",
+    },
+    {
+        "name": "vcruntime140_not_found",
+        "style": "dialog",
+        "title": "app.exe - System Error",
+        "lines": [
+            "The code execution cannot proceed because",
+            "VCRUNTIME140.dll was not found. Reinstalling the program",
+            "may fix this problem.",
+        ],
+        "expect_key": "vcruntime140.dll was not found",
+    },
+    {
+        "name": "directx_missing",
+        "style": "dialog",
+        "title": "Game Launcher",
+        "lines": ["DirectX Runtime missing.", "Please install the latest DirectX End-User Runtime."],
+        "expect_key": "directx runtime missing",
+    },
+    {
+        "name": "numpy_not_found",
+        "style": "console",
+        "lines": [
+            "C:\\Users\\student\\project> python train.py",
+            "Traceback (most recent call last):",
+            "  File \"C:\\Users\\student\\project\\train.py\", line 3, in <module>",
+            "    import numpy as np",
+            "ModuleNotFoundError: No module named 'numpy'",
+        ],
+        "expect_key": "modulenotfounderror no module named numpy",
+    },
+    {
+        "name": "indentation_error",
+        "style": "console",
+        "lines": [
+            "$ python3 main.py",
+            "  File \"/home/student/main.py\", line 12",
+            "    print(total)",
+            "IndentationError: unexpected indent",
+        ],
+        "expect_key": "indentationerror unexpected indent",
+    },
+    {
+        "name": "connection_refused",
+        "style": "console",
+        "lines": [
+            "> npm run dev",
+            "Starting server...",
+            "Error: connection refused on port 8080",
+        ],
+        "expect_key": "error connection refused on port 8080",
+    },
+    {
+        "name": "npm_eresolve",
+        "style": "console",
+        "lines": [
+            "npm ERR! code ERESOLVE",
+            "npm ERR! ERESOLVE unable to resolve dependency tree",
+            "npm ERR! Found: react@18.2.0",
+            "npm ERR! Could not resolve dependency: peer react@\"^17.0.0\"",
+        ],
+        "expect_key": None,
+    },
+    {
+        "name": "git_not_a_repository",
+        "style": "console",
+        "lines": [
+            "PS C:\\Users\\student\\Desktop> git status",
+            "fatal: not a git repository (or any of the parent directories): .git",
+        ],
+        "expect_key": None,
+    },
+    {
+        "name": "long_build_log",
+        "style": "console",
+        "lines": [f"Collecting package-{i} (from -r requirements.txt (line {i + 1}))" for i in range(40)] + [
+            "Traceback (most recent call last):",
+            "  File \"setup.py\", line 8, in <module>",
+            "ModuleNotFoundError: No module named 'numpy'",
+        ],
+        "expect_key": "modulenotfounderror no module named numpy",
+    },
+]
+
+
+def render(fixture) -> Image.Image:
+    font = ImageFont.load_default(size=18)
+    line_height = 26
+    if fixture["style"] == "dialog":
+        width = 640
+        height = 90 + line_height * len(fixture["lines"]) + 60
+        img = Image.new("RGB", (width, height), (240, 240, 240))
+        draw = ImageDraw.Draw(img)
+        # Title bar, message, OK button
+        draw.rectangle((0, 0, width, 36), fill=(255, 255, 255))
+        draw.text((12, 8), fixture["title"], font=font, fill=(0, 0, 0))
+        draw.ellipse((24, 64, 64, 104), fill=(215, 40, 40))
+        y = 60
+        for line in fixture["lines"]:
+            draw.text((84, y), line, font=font, fill=(0, 0, 0))
+            y += line_height
+        draw.rectangle((width - 120, height - 48, width - 24, height - 16), outline=(0, 120, 215), width=2)
+        draw.text((width - 88, height - 44), "OK", font=font, fill=(0, 0, 0))
+    else:
+        width = 900
+        height = 24 + line_height * len(fixture["lines"])
+        img = Image.new("RGB", (width, height), (12, 12, 12))
+        draw = ImageDraw.Draw(img)
+        y = 12
+        for line in fixture["lines"]:
+            color = (255, 95, 95) if "Error" in line or "ERR" in line or "fatal" in line else (204, 204, 204)
+            draw.text((10, y), line, font=font, fill=color)
+            y += line_height
+    return img
+
+
+def main():
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    manifest = []
+    for fixture in FIXTURES:
+        image_name = f"{fixture['name']}.png"
+        # 16-colour palette keeps the anti-aliasing but makes the PNGs small
+        image = render(fixture).quantize(colors=16)
+        image.save(os.path.join(CORPUS_DIR, image_name), optimize=True)
+        lines = ([fixture["title"]] if fixture["style"] == "dialog" else []) + fixture["lines"]
+        if fixture["style"] == "dialog":
+            lines.append("OK")
+        manifest.append({
+            "image": image_name,
+            "text": "\n".join(lines),
+            "expect_key": fixture["expect_key"],
+        })
+    with open(os.path.join(CORPUS_DIR, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {len(manifest)} fixtures to {CORPUS_DIR}")
+
+
+if __name__ == "__main__":
+    main()